@@ -10,20 +10,55 @@
 #
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
 
+import os
+
 # Global constants
 VERSION = '0.5'
 POSSIBLEFILEOUTEND = ['.out', '.sol']
+RESULTSCACHEFILE = '.csresults'
+CASETIMESFILE = '.cstimes'
+VALIDATIONSFILE = '.csvalid'
+SCRATCHDIRECTORIES = ['/dev/shm', '/run/shm']
+CACHEDIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'compileSystem')
+CALIBRATIONFILE = os.path.join(CACHEDIRECTORY, 'calibration.json')
+# Cpu time of the reference workload on the machine where the time limits are defined, saved with the problem
+REFERENCEFILE = '.csreference'
+# Environment variable with the token shared by the workers and the coordinators, a worker only runs the cases of a peer that knows it
+WORKERTOKENVARIABLE = 'CSWORKERTOKEN'
+# Settings used by runProcess and judgeCase when no option changes them, limitSettings fills them from the options
+DEFAULTSETTINGS = {'time':1, 'wallTime':2, 'memory':64, 'ioiMode':False, 'noOuts':False, 'multipleSolutions':False,
+                   'floatTolerance':0, 'checker':'', 'outputLimit':0, 'pin':False, 'nice':0, 'profile':False,
+                   'interactor':''}
 
 # IMPLEMENT no fork()
 # Check intro names with special characters
 # Check for modifications in original code(change make behavior)
 
-import os
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import hmac
+import json
+import math
+import queue
 import re
+import secrets
+import select
+import statistics
+import shlex
+import shutil
 import resource as res
 import subprocess
 import signal
+import socket
+import struct
+import tempfile
+import threading
 import time
+from itertools import count, zip_longest
+from xml.sax.saxutils import escape, quoteattr
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fnmatch import filter
 from sys import stdout, stderr, argv, platform
 from optparse import OptionGroup, OptionParser
@@ -32,6 +67,8 @@ from optparse import OptionGroup, OptionParser
 class MoreOptionsError(ValueError): pass
 # Class for invalid parameter error
 class ParamError(ValueError): pass
+# Class for a worker that broke the protocol or failed to run a case
+class WorkerError(IOError): pass
 
 # ASCII color codes for printing in terminal
 class bcolors:
@@ -54,6 +91,88 @@ class bcolors:
 # Object declaration for bcolors
 bcolorsObject = bcolors()
 
+# Machine readable report with one JSON object per line
+class JsonReport:
+    def __init__(self, fileName):
+        self.reportFile = open(fileName, 'w')
+
+    def startSuite(self, sourceFile):
+        self.sourceFile = sourceFile
+
+    def writeCase(self, result, fileInAddr):
+        '''Writes the record of a case as soon as it is received, so the report can be followed while it is written
+        The results are received in the order of the cases'''
+        record = {'type':'case', 'source':self.sourceFile, 'case':result['caseNumber'], 'input':fileInAddr,
+                  'status':result['status'], 'score':result['score'], 'cpuTime':result['time'],
+                  'wallTime':result['wallTime'], 'memory':result['memory'], 'outputSize':result.get('outputSize', 0),
+                  'mismatch':result['mismatch'], 'cached':result.get('cached', False), 'profile':result.get('profile')}
+        print(json.dumps(record), file = self.reportFile, flush = True)
+
+    def writeSummary(self, summary):
+        print(json.dumps(dict(summary, type='summary', source=self.sourceFile)), file = self.reportFile, flush = True)
+
+    def close(self):
+        self.reportFile.close()
+
+# Machine readable report in the JUnit XML format, each source is a testsuite and each case a testcase
+# The schema needs the counts of the testsuite in its attributes and the properties before the testcases,
+# so the cases of a source are kept until its summary is written
+class JunitReport(JsonReport):
+    def __init__(self, fileName):
+        self.reportFile = open(fileName, 'w')
+        self.testCases = None
+        print('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>', file = self.reportFile, flush = True)
+
+    def startSuite(self, sourceFile):
+        if self.testCases is not None:
+            self.writeSummary({})
+        self.sourceFile = sourceFile
+        self.testCases, self.failures, self.skipped, self.totalTime = [], 0, 0, 0.0
+
+    def writeCase(self, result, fileInAddr):
+        attributes = 'name=%s classname=%s time="%.4f"' % (quoteattr('case ' + result['caseNumber']), quoteattr(self.sourceFile), result['time'])
+        details = 'input: %s\nwall time: %.4f\nmemory: %s\noutput size: %d\nscore: %.4f' % (fileInAddr, result['wallTime'],
+                  formatMemory(result['memory']), result.get('outputSize', 0), result['score'])
+        if result['mismatch'] is not None:
+            details += '\nfirst difference: line %d token %d' % tuple(result['mismatch'])
+        if result.get('profile') is not None:
+            profile = result['profile']
+            details += '\ncycles: %s\ninstructions: %s\ncache misses: %s' % (formatCount(profile['cycles']),
+                       formatCount(profile['instructions']), formatCount(profile['cacheMisses']))
+            details += ''.join('\nhot function: %.2f%% %s' % (percentage, function) for function, percentage in profile['hotFunctions'])
+
+        if result['status'] in ['OK', 'NP']:
+            body = ''
+        elif result['status'] == 'SKP':
+            body = '<skipped/>'
+            self.skipped += 1
+        else:
+            body = '<failure type=%s message=%s/>' % (quoteattr(result['status']), quoteattr(result['status']))
+            self.failures += 1
+        self.totalTime += result['time']
+        self.testCases.append('    <testcase %s>%s<system-out>%s</system-out></testcase>' % (attributes, body, escape(details)))
+
+    def writeSummary(self, summary):
+        print('  <testsuite name=%s tests="%d" failures="%d" errors="0" skipped="%d" time="%.4f">' %
+              (quoteattr(self.sourceFile), len(self.testCases), self.failures, self.skipped, self.totalTime), file = self.reportFile)
+        print('    <properties>', file = self.reportFile)
+        for name, value in sorted(summary.items()):
+            print('      <property name=%s value=%s/>' % (quoteattr(name), quoteattr(str(value))), file = self.reportFile)
+        print('    </properties>', file = self.reportFile)
+        for testCase in self.testCases:
+            print(testCase, file = self.reportFile)
+        print('  </testsuite>', file = self.reportFile, flush = True)
+        self.testCases = None
+
+    def close(self):
+        # A source without a summary, for example one without a score, is still written
+        if self.testCases is not None:
+            self.writeSummary({})
+        print('</testsuites>', file = self.reportFile)
+        self.reportFile.close()
+
+reportFormats = {'json':JsonReport, 'junit':JunitReport}
+
 def exitFunction(args):
     raise EOFError
 
@@ -155,239 +274,1827 @@ def locate(pattern, root=os.curdir):
         for filename in filter(files, pattern):
             yield os.path.join(path, filename)
 
+def hashFile(fileName):
+    '''Returns the sha256 hex digest of the contents of fileName, the file is read in blocks'''
+    fileHash = hashlib.sha256()
+    with open(fileName, 'rb') as fileToHash:
+        for block in iter(lambda: fileToHash.read(1 << 20), b''):
+            fileHash.update(block)
+    return fileHash.hexdigest()
+
+# Hashes of the case files, keyed by their path, modification time and size
+fileHashes = {}
+
+def cachedHashFile(fileName):
+    '''Same as hashFile, but a file is only read again if it was modified'''
+    fileStat = os.stat(fileName)
+    fileKey = (os.path.abspath(fileName), fileStat.st_mtime_ns, fileStat.st_size)
+    if fileKey not in fileHashes:
+        fileHashes[fileKey] = hashFile(fileName)
+    return fileHashes[fileKey]
+
+# Output of --version for each compiler, so it is only asked once
+compilerVersions = {}
+
+def compilerVersion(compiler):
+    '''Returns the version string reported by the compiler, or '' if it could not be executed'''
+    if compiler not in compilerVersions:
+        try:
+            compilerVersions[compiler] = subprocess.check_output([compiler, '--version'], stderr=subprocess.STDOUT).decode()
+        except (OSError, subprocess.CalledProcessError):
+            compilerVersions[compiler] = ''
+    return compilerVersions[compiler]
+
+def sourceDependencies(sourceFile, compiler, flags):
+    '''Returns the sorted list of the local headers included by sourceFile, as found by the compiler with -MM
+    The system headers are not listed, they change with the compiler version. Returns None if the compiler failed'''
+    try:
+        rule = subprocess.check_output([compiler, '-MM', sourceFile] + flags, stderr=subprocess.DEVNULL).decode()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # The rule is target: source headers..., split in lines ending in \ and with the spaces of the paths escaped
+    prerequisites = rule.replace('\\\n', ' ').split(':', 1)[-1]
+    paths = [path.replace('\\ ', ' ') for path in re.split(r'(?<!\\)\s+', prerequisites.strip()) if path != '']
+    return sorted(set(path for path in paths if os.path.abspath(path) != os.path.abspath(sourceFile)))
+
+def compileCacheFile(sourceFile, compiler, flags):
+    '''Returns the path of the cached executable for sourceFile, or '' if its headers could not be found
+    The name is the hash of the source contents, the local headers it includes and their contents,
+    the compiler, its version and the flags used'''
+    dependencies = sourceDependencies(sourceFile, compiler, flags)
+    if dependencies is None:
+        return ''
+    cacheKey = hashlib.sha256()
+    for part in [hashFile(sourceFile), compiler, compilerVersion(compiler)] + flags:
+        cacheKey.update(part.encode() + b'\0')
+    for dependency in dependencies:
+        cacheKey.update(dependency.encode() + b'\0' + hashFile(dependency).encode() + b'\0')
+    return os.path.join(CACHEDIRECTORY, 'executables', cacheKey.hexdigest())
+
+# Process groups of the evaluated programs that are still running, they do not belong to our own group
+runningProcesses = set()
+
+def killProcessGroup(pid):
+    '''Kills the whole process group started by pid, it may have already finished'''
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
 def killProcess(sign, frame):
     stdout.write(bcolorsObject.ENDC);
     stderr.write(bcolorsObject.ENDC);
+    for pid in list(runningProcesses):
+        killProcessGroup(pid)
+    for cgroup in list(runningCgroups):
+        removeCgroup(cgroup)
     os.killpg(os.getpgrp(), signal.SIGTERM)
-    os.exit(0)
-
-def compileSource(sourceFile, verbose=True, optimized=True):
-    '''Compile the source file provided by the parser
-    sourceFile is a string to the path of the file to be compiled
-    verbose specifies if the code is to print the warning and error messages
-    optimized adds the -O2 flag to the compiler
-    returns the name of the executable file. It is compiled in the current directory(os.currdir)
-    if an error was encountered, returns '' '''
-    # Check if source exists
-    try:
-        open(sourceFile, 'r')
-    except IOError as e:
-        print(bcolorsObject.FAIL + 'File %s does not exist' % (sourceFile) + bcolorsObject.ENDC, file=stderr)
-        return ''
+    os._exit(0)
 
-    # Check for file extension and set the correct compiler
+def sourceCompiler(sourceFile):
+    '''Returns the compiler for the extension of sourceFile, or '' if the extension is unknown'''
     fileName, extension = os.path.splitext(sourceFile)
     if extension=='.cpp':
-        if platform == 'darwin':
-            compiler='clang++'
-        else:
-            compiler='g++'
+        return 'clang++' if platform == 'darwin' else 'g++'
     elif extension=='.c':
-        if platform == 'darwin':
-            compiler='clang'
+        return 'clang' if platform == 'darwin' else 'gcc'
+    return ''
+
+def usesPrecompiledHeader(build):
+    '''Checks if a build can use the precompiled bits/stdc++.h, only g++ finds precompiled headers by itself'''
+    if build['compiler'] != 'g++':
+        return False
+    with open(build['source'], 'r', errors='replace') as sourceFile:
+        return re.search(r'^\s*#\s*include\s*<bits/stdc\+\+\.h>', sourceFile.read(), re.MULTILINE) is not None
+
+def precompiledHeaderDirectory(compiler, flags):
+    '''Returns the include directory with the precompiled bits/stdc++.h for the compiler, its version and the flags
+    g++ checks the precompiled header before the real header, if it is stale or incompatible it is ignored and removed by buildExecutables'''
+    pchKey = hashlib.sha256()
+    for part in [compiler, compilerVersion(compiler)] + flags:
+        pchKey.update(part.encode() + b'\0')
+    return os.path.join(CACHEDIRECTORY, 'pch', pchKey.hexdigest())
+
+def printCompileLog(logFile):
+    '''Prints the messages of the compiler saved in logFile'''
+    with open(logFile, 'r') as compileLog:
+        print(bcolorsObject.DEBUG + compileLog.read() + bcolorsObject.ENDC, end = '')
+
+def buildExecutables(builds, verbose=True, useCache=True, jobs=1, pch=False):
+    '''Compile a list of builds with a single make call that runs up to jobs compilers at the same time
+    Each build is a dictionary with the source, compiler, flags and executable to be created
+    Each build is compiled in its own directory with its own log, a failed build does not stop the others
+    useCache copies the executables that were already compiled from the compile cache
+    pch precompiles bits/stdc++.h once for each compiler and flags and uses it for the sources that include it
+    returns the list with the executable of each build, it is '' for the builds that failed'''
+    executables = [''] * len(builds)
+    pendingBuilds = []
+    for index, build in enumerate(builds):
+        # If the source was already compiled copy the executable from the cache
+        # Without the cache its file is not needed, so g++ -MM is not run for the build
+        build['cachedExecutable'] = compileCacheFile(build['source'], build['compiler'], build['flags']) if useCache else ''
+        if build['cachedExecutable'] != '' and os.path.isfile(build['cachedExecutable']):
+            shutil.copy2(build['cachedExecutable'], build['executable'])
+            print(bcolorsObject.HEADER + 'Compilation success of %s (cached)' % (build['executable']) + bcolorsObject.ENDC)
+            executables[index] = build['executable']
         else:
-            compiler='gcc'
-    else:
-        print(bcolorsObject.FAIL + 'Error: Unknown file extension of %s' % (sourceFile) + bcolorsObject.ENDC, file = stderr)
-        return ''
+            pendingBuilds.append(index)
 
-    # Open the make configuration file
-    optimization = ('-O2' if optimized else '')
-    with open('.makeFile', 'w') as makeFile:
-        print('all:\n\t %s -g %s -o %s %s' % (compiler, sourceFile, fileName, optimization), file = makeFile)
+    if pendingBuilds == []:
+        return executables
 
-    # Call make
-    with open('.compile.log', 'w') as compileLog:
-        subprocess.call(['make', '-f', '.makeFile'], stdout = compileLog, stderr = compileLog)
+    # Every call uses its own build directory, so concurrent calls never share a makefile or a log
+    buildDirectory = tempfile.mkdtemp(prefix='.csbuild.', dir='.')
+    def makeCommand(command):
+        return ' '.join(shlex.quote(part) for part in command).replace('$', '$$')
 
-    # If make returned an error
-    with open('.compile.log') as compileLog:
-        compileText = compileLog.read()
+    try:
+        with open(os.path.join(buildDirectory, 'Makefile'), 'w') as makeFile:
+            print('all: %s\n.PHONY: all %s' % (' '.join('build%d' % index for index in pendingBuilds),
+                                                ' '.join('build%d' % index for index in pendingBuilds)), file = makeFile)
+
+            # Each missing precompiled header is built once before the sources that use it
+            # if it fails the sources are still compiled with the real header
+            pchTargets = {}
+            for index in pendingBuilds:
+                build = builds[index]
+                build['pchDirectory'] = ''
+                if not pch or not usesPrecompiledHeader(build):
+                    continue
+                build['pchDirectory'] = precompiledHeaderDirectory(build['compiler'], build['flags'])
+                pchFile = os.path.join(build['pchDirectory'], 'bits', 'stdc++.h.gch')
+                if os.path.isfile(pchFile) or build['pchDirectory'] in pchTargets:
+                    continue
 
-    if 'error' in compileText or 'ld returned' in open('.compile.log').read():
-        print(bcolorsObject.FAIL + 'Compilation error for %s\nThe error was:' % (sourceFile) + bcolorsObject.ENDC, file = stderr)
-        subprocess.call(['echo', '-ne', bcolorsObject.DEBUG])
-        subprocess.call(['cat', '.compile.log'])
-        subprocess.call(['echo', '-ne', bcolorsObject.ENDC])
-        return ''
+                pchTargets[build['pchDirectory']] = 'pch%d' % (len(pchTargets))
+                stubHeader = os.path.join(buildDirectory, 'stdc++.h')
+                with open(stubHeader, 'w') as stubFile:
+                    print('#include <bits/stdc++.h>', file = stubFile)
+                temporaryPch = pchFile + '.%d' % (os.getpid())
+                command = [build['compiler'], '-x', 'c++-header', stubHeader, '-o', temporaryPch] + build['flags']
+                print('%s:\n\tmkdir -p %s && %s > %s 2>&1 && mv %s %s || true' %
+                      (pchTargets[build['pchDirectory']], makeCommand([os.path.dirname(pchFile)]), makeCommand(command),
+                       makeCommand([os.path.join(buildDirectory, pchTargets[build['pchDirectory']] + '.log')]),
+                       makeCommand([temporaryPch]), makeCommand([pchFile])), file = makeFile)
+
+            for index in pendingBuilds:
+                build = builds[index]
+                build['directory'] = os.path.join(buildDirectory, str(index))
+                os.mkdir(build['directory'])
+                command = [build['compiler'], build['source'], '-o', os.path.join(build['directory'], 'executable')] + build['flags']
+                # -Winvalid-pch reports a precompiled header that g++ ignored, so it can be built again
+                if build['pchDirectory'] != '':
+                    command += ['-I', build['pchDirectory'], '-Winvalid-pch']
+                logFile = makeCommand([os.path.join(build['directory'], 'compile.log')])
+                print('build%d: %s\n\t%s > %s 2>&1' % (index, pchTargets.get(build['pchDirectory'], ''), makeCommand(command), logFile), file = makeFile)
+
+        # Call make, -k keeps compiling the other sources when one of them fails
+        with open(os.path.join(buildDirectory, 'make.log'), 'w') as makeLog:
+            subprocess.call(['make', '-k', '-j', str(jobs), '-f', os.path.join(buildDirectory, 'Makefile')], stdout = makeLog, stderr = makeLog)
+
+        rejectedPchDirectories = set()
+        for index in pendingBuilds:
+            build = builds[index]
+            logFile = os.path.join(build['directory'], 'compile.log')
+            with open(logFile) as compileLog:
+                compileText = compileLog.read()
+
+            # A corrupt or incompatible precompiled header is removed, the source was compiled with the real header
+            if build['pchDirectory'] != '' and '[-Winvalid-pch]' in compileText and build['pchDirectory'] not in rejectedPchDirectories:
+                rejectedPchDirectories.add(build['pchDirectory'])
+                try:
+                    os.remove(os.path.join(build['pchDirectory'], 'bits', 'stdc++.h.gch'))
+                except OSError:
+                    pass
+                print(bcolorsObject.WARNING + 'The precompiled bits/stdc++.h was rejected by %s, it will be built again' %
+                      (build['compiler']) + bcolorsObject.ENDC, file = stderr)
+
+            # If the compiler returned an error
+            if 'error' in compileText or 'ld returned' in compileText:
+                print(bcolorsObject.FAIL + 'Compilation error for %s\nThe error was:' % (build['source']) + bcolorsObject.ENDC, file = stderr)
+                printCompileLog(logFile)
+                continue
+
+            # If the compiler returned a warning
+            elif 'warning' in compileText and verbose:
+                print(bcolorsObject.WARNING + 'Warning error for %s\nThe warning was:' % (build['source']) + bcolorsObject.ENDC, file = stderr)
+                printCompileLog(logFile)
+
+            # Check if output file exists
+            if not os.path.isfile(os.path.join(build['directory'], 'executable')):
+                print(bcolorsObject.FAIL + 'Error ocurred during compilation of %s\nThis error is unknown' % (build['source']) + bcolorsObject.ENDC, file = stderr)
+                continue
+
+            os.replace(os.path.join(build['directory'], 'executable'), build['executable'])
+            os.chmod(build['executable'], os.stat(build['executable']).st_mode | 0o111) #Make file executable
+
+            # Store the executable in the cache, it is copied first so other processes never see a partial file
+            if build['cachedExecutable'] != '':
+                try:
+                    os.makedirs(os.path.dirname(build['cachedExecutable']), exist_ok=True)
+                    shutil.copy2(build['executable'], build['cachedExecutable'] + '.%d' % (os.getpid()))
+                    os.replace(build['cachedExecutable'] + '.%d' % (os.getpid()), build['cachedExecutable'])
+                except OSError:
+                    print(bcolorsObject.WARNING + 'Could not store %s in the compile cache' % (build['executable']) + bcolorsObject.ENDC, file = stderr)
 
-    # If make returned a warning
-    elif 'warning' in compileText and verbose:
-        print(bcolorsObject.WARNING + 'Warning error for %s\nThe warning was:' % (sourceFile) + bcolorsObject.ENDC, file = stderr)
-        subprocess.call(['echo', '-ne', bcolorsObject.DEBUG])
-        subprocess.call(['cat', '.compile.log'])
-        subprocess.call(['echo', '-ne', bcolorsObject.ENDC])
+            print(bcolorsObject.HEADER + 'Compilation success of %s' % (build['executable']) + bcolorsObject.ENDC)
+            executables[index] = build['executable']
+    finally:
+        shutil.rmtree(buildDirectory, ignore_errors=True)
 
-    # Check if output file exists
-    try:
-        open(fileName, 'r');
-    except IOError as e:
-        print(bcolorsObject.FAIL + 'Error ocurred during compilation\nThis error is unknown' + bcolorsObject.ENDC, file = stderr)
-        return ''
+    return executables
 
-    subprocess.call(['chmod', '+x', fileName]) #Make file executable
-    print(bcolorsObject.HEADER + 'Compilation success of %s' % (fileName) + bcolorsObject.ENDC)
-    return fileName
+def compileSources(sourceFiles, verbose=True, optimized=True, useCache=True, jobs=1, pch=False):
+    '''Compile all the source files provided by the parser together, up to jobs of them at the same time
+    verbose specifies if the code is to print the warning and error messages
+    optimized adds the -O2 flag to the compiler
+    useCache reuses the executable of a previous compilation of the same source with the same compiler and flags
+    pch uses a cached precompiled bits/stdc++.h for the sources that include it
+    returns a dictionary with the name of the executable of each source file, it is the source file without
+    the extension. If an error was encountered for a source its executable is '' '''
+    executables, builds = {}, []
+    for sourceFile in sourceFiles:
+        if sourceFile in executables:
+            continue
+        executables[sourceFile] = ''
 
-def evaluate(sourceFile, currentDirectory, maximumTime=1, verbose=False, 
-             ioiMode=False, memory=64, noOuts=False, multipleSolutions=False, alternateValues=''):
-    '''Evaluate the source file with the .in cases found in currentDirectory
-    By default the maximum time is the time for the program to be evaluated
-    Verbose mode is true by default, if set to false, the program will only print errors and the end results
-    ioiMode allows an infinite stack only to be limited by memory
-    memory is the maximum size for the virtual memory
-    noOuts only checks the program for Runtime Errors and Time Limit Exceeded not evaluating the result for each case
-    multipleSolutions is similar to noOuts, only it check for a substring in the output file
-    alternateValues is a specialized mode if some cases are worth more than others'''
-    maxMemoryInBytes = int(memory*1024*1024)
-    maxTimeInSeconds = int(maximumTime)
+        # Check if source exists
+        if not os.path.isfile(sourceFile):
+            print(bcolorsObject.FAIL + 'File %s does not exist' % (sourceFile) + bcolorsObject.ENDC, file=stderr)
+            continue
 
-    def processLimit():
+        # Check for file extension and set the correct compiler
+        compiler = sourceCompiler(sourceFile)
+        if compiler == '':
+            print(bcolorsObject.FAIL + 'Error: Unknown file extension of %s' % (sourceFile) + bcolorsObject.ENDC, file = stderr)
+            continue
+
+        builds.append({'source':sourceFile,
+                       'compiler':compiler,
+                       'flags':['-g'] + (['-O2'] if optimized else []),
+                       'executable':os.path.splitext(sourceFile)[0]})
+
+    for build, executable in zip(builds, buildExecutables(builds, verbose, useCache, jobs, pch)):
+        executables[build['source']] = executable
+    return executables
+
+def compileSource(sourceFile, verbose=True, optimized=True, useCache=True, pch=False):
+    '''Compile the source file provided by the parser
+    sourceFile is a string to the path of the file to be compiled
+    verbose specifies if the code is to print the warning and error messages
+    optimized adds the -O2 flag to the compiler
+    useCache reuses the executable of a previous compilation of the same source with the same compiler and flags
+    pch uses a cached precompiled bits/stdc++.h if the source includes it
+    returns the name of the executable file. It is compiled in the current directory(os.currdir)
+    if an error was encountered, returns '' '''
+    return compileSources([sourceFile], verbose, optimized, useCache, 1, pch)[sourceFile]
+
+def flagMatrixBuilds(sourceFiles, matrix):
+    '''Returns the builds of every source file with every flag set of matrix, to be compiled by buildExecutables
+    matrix is a semicolon separated list of COMPILER:FLAGS, like "g++:-O2;g++:-O3 -march=native;clang++:-O2",
+    if COMPILER: is omitted the default compiler of the source is used. Each build has a label with its source,
+    compiler and flags, and its executable is the source file without the extension followed by .buildN
+    The builds of a compiler that is not installed are reported and left out
+    returns None if the matrix is invalid'''
+    flagSets = []
+    for entry in matrix.split(';'):
+        if entry.strip() == '':
+            continue
+        compiler, separator, flags = entry.partition(':')
+        if not separator:
+            compiler, flags = '', entry
         try:
-            res.setrlimit(res.RLIMIT_NPROC, (1, 1))
-            if ioiMode:
-                res.setrlimit(res.RLIMIT_STACK, (RLIM_INFINITY, RLIM_INFINITY))
-                res.setrlimit(res.RLIMIT_CPU, (maxTimeInSeconds, maxTimeInSeconds))
-                res.setrlimit(res.RLIMIT_AS, (maxMemoryInBytes, maxMemoryInBytes))
-        except ValueError as e:
-            stderr.write(bcolorsObject.FAIL + 'Limit specified is invalid\n%s' % e + bcolorsObject.ENDC)
-            exit(-1)
+            flagSets.append((compiler.strip(), shlex.split(flags)))
+        except ValueError:
+            print(bcolorsObject.FAIL + 'Error: Invalid flags %s' % (entry) + bcolorsObject.ENDC, file = stderr)
+            return None
+    if flagSets == []:
+        print(bcolorsObject.FAIL + 'Error: No flags were given in %s' % (matrix) + bcolorsObject.ENDC, file = stderr)
+        return None
+
+    builds, missingCompilers = [], set()
+    for sourceFile in sourceFiles:
+        if sourceCompiler(sourceFile) == '':
+            print(bcolorsObject.FAIL + 'Error: Unknown file extension of %s' % (sourceFile) + bcolorsObject.ENDC, file = stderr)
+            continue
+        for index, (compiler, flags) in enumerate(flagSets, 1):
+            compiler = compiler or sourceCompiler(sourceFile)
+            if shutil.which(compiler) is None:
+                if compiler not in missingCompilers:
+                    print(bcolorsObject.FAIL + 'Error: The compiler %s is not installed, its builds are skipped' % (compiler) +
+                          bcolorsObject.ENDC, file = stderr)
+                    missingCompilers.add(compiler)
+                continue
+            builds.append({'source':sourceFile,
+                           'compiler':compiler,
+                           'flags':['-g'] + flags,
+                           'executable':os.path.splitext(sourceFile)[0] + '.build%d' % (index),
+                           'label':' '.join([sourceFile, compiler] + flags)})
+    return builds
+
+# cgroup v2 directory where the cgroup of each program is created, it is '' if cgroups can not be used
+cgroupParent = None
+# Without a cgroup a program can use MEMORYHEADROOM times the memory limit, so one that uses more than the limit
+# finishes and is MLE by its peak memory instead of failing an allocation
+MEMORYHEADROOM = 4
+cgroupParentLock = threading.Lock()
+# cgroups of the programs that are still running, and the counter used to name them
+runningCgroups = set()
+cgroupCounter = count()
+
+def memoryCgroupParent():
+    '''Returns the cgroup v2 directory where a cgroup with a memory limit can be created for each program,
+    or '' if this process can not create them and the memory is limited with RLIMIT_DATA. It is only checked once,
+    the other threads wait for the check so all the cases of an evaluation are limited the same way'''
+    global cgroupParent
+    with cgroupParentLock:
+        if cgroupParent is None:
+            cgroupParent = findCgroupParent()
+    return cgroupParent
+
+def findCgroupParent():
+    '''Returns the directory described in memoryCgroupParent, it is checked by creating a test cgroup
+    cgroup v2 does not enable a controller for the children of a cgroup that has processes, so if the cgroup of this
+    process is not the root the processes in it are moved to its child cgroup cs.leaf first. The cgroup must be
+    delegated to the user, for example with systemd-run --user --scope -p Delegate=yes'''
+    try:
+        with open('/proc/self/cgroup', 'r') as cgroupFile:
+            cgroupPath = [line.strip()[3:] for line in cgroupFile if line.startswith('0::')]
+        with open('/proc/self/mounts', 'r') as mountsFile:
+            mountPoints = [line.split()[1] for line in mountsFile if line.split()[2] == 'cgroup2']
+        if not cgroupPath or not mountPoints:
+            return ''
+
+        parent = os.path.join(mountPoints[0], cgroupPath[0].lstrip('/'))
+        if 'memory' not in readCgroupFile(parent, 'cgroup.controllers').split():
+            return ''
+        if 'memory' not in readCgroupFile(parent, 'cgroup.subtree_control').split():
+            try:
+                with open(os.path.join(parent, 'cgroup.subtree_control'), 'w') as controlFile:
+                    controlFile.write('+memory')
+            except OSError as e:
+                if e.errno != errno.EBUSY:
+                    raise
+                leaf = os.path.join(parent, 'cs.leaf')
+                os.makedirs(leaf, exist_ok=True)
+                for pid in readCgroupFile(parent, 'cgroup.procs').split():
+                    try:
+                        with open(os.path.join(leaf, 'cgroup.procs'), 'w') as procsFile:
+                            procsFile.write(pid)
+                    except OSError:
+                        pass
+                with open(os.path.join(parent, 'cgroup.subtree_control'), 'w') as controlFile:
+                    controlFile.write('+memory')
+
+        # Check that a child can be created and that its memory can be limited
+        testCgroup = os.path.join(parent, 'cs.%d.test' % (os.getpid()))
+        os.mkdir(testCgroup)
+        try:
+            if os.path.isfile(os.path.join(testCgroup, 'memory.max')):
+                return parent
+        finally:
+            os.rmdir(testCgroup)
+    except (OSError, IndexError):
+        pass
+    return ''
+
+def createCgroup(settings):
+    '''Creates a cgroup limited to the memory in settings, plus the output limit because the output pages are charged to it
+    returns the cgroup directory, or '' if cgroups can not be used'''
+    parent = memoryCgroupParent()
+    if parent == '':
+        return ''
 
+    cgroup = os.path.join(parent, 'cs.%d.%d' % (os.getpid(), next(cgroupCounter)))
+    try:
+        os.mkdir(cgroup)
+    except OSError:
+        return ''
+    runningCgroups.add(cgroup)
 
-    # Initialization of local variables
-    total, testCases, totalTime = 0, 0, 0
-    executable, extension = os.path.splitext(sourceFile)
+    maxMemoryInBytes = int((settings['memory'] + settings['outputLimit'])*1024*1024)
+    try:
+        with open(os.path.join(cgroup, 'memory.max'), 'w') as limitFile:
+            limitFile.write(str(maxMemoryInBytes) if settings['memory'] > 0 else 'max')
+    except OSError:
+        removeCgroup(cgroup)
+        return ''
 
-    # Open a loging file for the errors
+    # Without swap the program is killed as soon as it needs more memory
     try:
-        cslog = open('.cslog', 'a')
-    except IOError:
-        print(bcolorsObject.FAIL + 'Will not log errors\n' + bcolorsObject.ENDC, file = stderr)
-        return
+        with open(os.path.join(cgroup, 'memory.swap.max'), 'w') as swapFile:
+            swapFile.write('0')
+    except OSError:
+        pass
+    return cgroup
+
+def readCgroupFile(cgroup, fileName):
+    '''Returns the contents of fileName in cgroup, or '' if it does not exist in this kernel'''
+    try:
+        with open(os.path.join(cgroup, fileName), 'r') as cgroupFile:
+            return cgroupFile.read()
+    except OSError:
+        return ''
 
-    # If specified, load the alternate values table
-    if alternateValues != '':
+def removeCgroup(cgroup):
+    '''Kills the programs left in cgroup and removes it, it can take a moment until the cgroup is empty'''
+    try:
+        with open(os.path.join(cgroup, 'cgroup.kill'), 'w') as killFile:
+            killFile.write('1')
+    except OSError:
+        pass
+    for attempt in range(50):
         try:
-            open(alternateValues, 'r')
-        except IOError:
-            print(bcolorsObject.FAIL + 'Failed to open table\n' + bcolorsObject.ENDC, file = stderr)
-            alternateValues = ''
+            os.rmdir(cgroup)
+            break
+        except FileNotFoundError:
+            break
+        except OSError:
+            time.sleep(0.01)
+    runningCgroups.discard(cgroup)
+
+# Cores where the programs are pinned, a program takes a core while it runs so no two programs share one
+freeCores = None
+freeCoresLock = threading.Lock()
+
+def acquireCore():
+    '''Waits until one of the cores this process can use is free and returns it'''
+    global freeCores
+    with freeCoresLock:
+        if freeCores is None:
+            freeCores = queue.Queue()
+            for core in sorted(os.sched_getaffinity(0)):
+                freeCores.put(core)
+    return freeCores.get()
+
+def releaseCore(core):
+    '''Returns a core taken with acquireCore'''
+    freeCores.put(core)
+
+def limitProcess(settings, procsFd=None, core=None):
+    '''Returns the function that sets the resource limits in settings for a child process before it is executed
+    It runs in the child between the fork and the exec, while other threads may hold locks, so it only makes system calls,
+    everything is computed here and an error is raised to startProcess instead of being reported in the child
+    If procsFd, the cgroup.procs file of a cgroup, is given the child moves itself to the cgroup and its memory
+    is limited by it. If not RLIMIT_DATA limits it to MEMORYHEADROOM times the memory limit, it does not count the
+    address space that is reserved but not written. If a core is given the child is pinned to it'''
+    maxMemoryInBytes = int(settings['memory']*1024*1024)
+    maxHeadroomInBytes = maxMemoryInBytes*MEMORYHEADROOM
+    maxTimeInSeconds = int(math.ceil(settings['time']))
+    maxOutputInBytes = int(settings['outputLimit']*1024*1024)
+
+    limits = []
+    # The profiler starts the program as its own child
+    if not settings['profile']:
+        limits.append((res.RLIMIT_NPROC, (1, 1)))
+    # SIGXCPU is sent when the time limit is reached and SIGKILL a second after
+    if settings['time'] > 0:
+        limits.append((res.RLIMIT_CPU, (maxTimeInSeconds, maxTimeInSeconds + 1)))
+    # SIGXFSZ is sent when a file, like the stdout of the program, grows over the output limit. One byte more is allowed,
+    # so an output of exactly the limit is accepted and a program that ignores the signal leaves a file bigger than it
+    if settings['outputLimit'] > 0:
+        limits.append((res.RLIMIT_FSIZE, (maxOutputInBytes + 1, maxOutputInBytes + 1)))
+    # The profiler runs in the same process, so it is not limited
+    memoryRlimit = procsFd is None and not settings['profile'] and settings['memory'] > 0
+    # In ioiMode the stack is only limited by the memory, RLIMIT_DATA does not count it
+    if settings['ioiMode']:
+        stackLimit = maxHeadroomInBytes if memoryRlimit else res.RLIM_INFINITY
+        limits.append((res.RLIMIT_STACK, (stackLimit, stackLimit)))
+    if memoryRlimit:
+        limits.append((getattr(res, 'RLIMIT_DATA', res.RLIMIT_AS), (maxHeadroomInBytes, maxHeadroomInBytes)))
+    nice = settings['nice']
 
-    # For each *.in* file found in the working directory sort the files
+    def processLimit():
+        if procsFd is not None:
+            os.write(procsFd, b'0')
+        if core is not None:
+            os.sched_setaffinity(0, {core})
+        # Raising the priority needs privileges, without them the program runs with the default one
+        if nice != 0:
+            try:
+                os.nice(nice)
+            except OSError:
+                pass
+        for resource, limit in limits:
+            res.setrlimit(resource, limit)
+
+    return processLimit
+
+def startProcess(command, fileIn, fileOut, settings, cwd=None, fileErr=None):
+    '''Starts command with fileIn as stdin and fileOut as stdout under the limits in settings, in the directory cwd
+    fileErr is the stderr of the command, by default it is inherited
+    The child runs in its own process group, which is killed by a watchdog once the wall time limit is reached
+    The memory is limited and measured by a cgroup if they can be used, if not by rlimits and wait4
+    A time, wall time or memory of 0 in settings is not limited
+    If settings has pin the child waits for a free core and runs pinned to it
+    returns the running process, it must be waited with waitProcess'''
+    core = acquireCore() if settings['pin'] else None
+    cgroup = createCgroup(settings)
+    timeStart = time.time()
+    procsFd = None
+    try:
+        # The cgroup.procs file is opened here, writing 0 to it moves the child that writes it
+        if cgroup != '':
+            procsFd = os.open(os.path.join(cgroup, 'cgroup.procs'), os.O_WRONLY)
+        process = subprocess.Popen(command, stdin=fileIn, stdout=fileOut, stderr=fileErr,
+                                   preexec_fn=limitProcess(settings, procsFd, core), start_new_session=True, cwd=cwd)
+    except (OSError, subprocess.SubprocessError) as e:
+        if cgroup != '':
+            removeCgroup(cgroup)
+        if core is not None:
+            releaseCore(core)
+        # Popen raises SubprocessError if the limits could not be set in the child
+        if isinstance(e, subprocess.SubprocessError):
+            print(bcolorsObject.FAIL + 'Limit specified is invalid\n%s' % e + bcolorsObject.ENDC, file = stderr)
+            exit(-1)
+        raise
+    finally:
+        if procsFd is not None:
+            os.close(procsFd)
+    runningProcesses.add(process.pid)
+
+    # The lock avoids killing the group after the child was reaped and its pid reused
+    watchdogLock, watchdogState = threading.Lock(), {'finished':False, 'timedOut':False}
+    def watchdog():
+        with watchdogLock:
+            if not watchdogState['finished']:
+                watchdogState['timedOut'] = True
+                killProcessGroup(process.pid)
+    watchdogTimer = threading.Timer(settings['wallTime'], watchdog) if settings['wallTime'] > 0 else None
+    if watchdogTimer is not None:
+        watchdogTimer.start()
+
+    return {'process':process, 'fileOut':fileOut, 'core':core, 'cgroup':cgroup, 'timeStart':timeStart,
+            'watchdogLock':watchdogLock, 'watchdogState':watchdogState, 'watchdogTimer':watchdogTimer}
+
+def waitProcess(running):
+    '''Waits for a process started by startProcess, the child is waited with wait4 so its resource usage is obtained from the kernel
+    returns a dictionary with the returnCode, the cpuTime (user + sys), the wallTime, the peak memory in MB or None,
+    timedOut if the watchdog killed the program and memoryExceeded if the cgroup killed it for its memory
+    memoryMeasured is True if the memory is the peak of the program. Without a cgroup it is ru_maxrss, which also counts
+    the pages of this interpreter copied by the fork, so it is only the peak of the program if it is bigger than them,
+    if not the memory is None because it could not be measured'''
+    process, fileOut, core, cgroup = running['process'], running['fileOut'], running['core'], running['cgroup']
+
+    # Wait for the child without reaping it, so its process group is valid until the watchdog is disabled
+    os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+    with running['watchdogLock']:
+        running['watchdogState']['finished'] = True
+    if running['watchdogTimer'] is not None:
+        running['watchdogTimer'].cancel()
+    killProcessGroup(process.pid)
+
+    pid, status, usage = os.wait4(process.pid, 0)
+    wallTime = time.time() - running['timeStart']
+    process.returncode = os.waitstatus_to_exitcode(status)
+    runningProcesses.discard(process.pid)
+    if core is not None:
+        releaseCore(core)
+
+    # ru_maxrss is in bytes on darwin and in kilobytes everywhere else
+    megabyte = 1024*1024 if platform == 'darwin' else 1024
+    memoryUsed = usage.ru_maxrss / megabyte
+    memoryExceeded = False
+    memoryMeasured = memoryUsed > res.getrusage(res.RUSAGE_SELF).ru_maxrss / megabyte
+    if cgroup != '':
+        # memory.peak counts the pages of the output file written by the program, they are not its memory
+        peak = readCgroupFile(cgroup, 'memory.peak').strip()
+        if peak.isdigit():
+            outputSize = os.fstat(fileOut.fileno()).st_size if hasattr(fileOut, 'fileno') else 0
+            memoryUsed = max(int(peak) - outputSize, 0) / (1024*1024)
+            memoryMeasured = True
+        events = dict(line.split() for line in readCgroupFile(cgroup, 'memory.events').splitlines())
+        memoryExceeded = int(events.get('oom_kill', 0)) > 0
+        removeCgroup(cgroup)
+
+    return {'returnCode':process.returncode,
+            'cpuTime':usage.ru_utime + usage.ru_stime,
+            'wallTime':wallTime,
+            'memory':memoryUsed if memoryMeasured else None,
+            'timedOut':running['watchdogState']['timedOut'],
+            'memoryExceeded':memoryExceeded,
+            'memoryMeasured':memoryMeasured}
+
+def runProcess(command, fileIn, fileOut, settings, cwd=None, fileErr=None):
+    '''Run command with fileIn as stdin and fileOut as stdout under the limits in settings, in the directory cwd
+    fileErr is the stderr of the command, by default it is inherited
+    returns the usage of the process as described in waitProcess'''
+    return waitProcess(startProcess(command, fileIn, fileOut, settings, cwd, fileErr))
+
+def readTokens(fileName, blockSize=1 << 16):
+    '''Generator of the whitespace separated tokens of fileName as (line, token) tuples
+    The file is read in blocks of blockSize bytes, so it is never completely loaded in memory'''
+    line, partialToken = 1, b''
+    with open(fileName, 'rb') as fileTokens:
+        for block in iter(lambda: fileTokens.read(blockSize), b''):
+            block = partialToken + block
+            # The last token of the block may continue in the next block
+            lastSpace = max(block.rfind(space) for space in [b' ', b'\n', b'\t', b'\r', b'\x0b', b'\x0c'])
+            block, partialToken = block[:lastSpace + 1], block[lastSpace + 1:]
+            blockLines = block.split(b'\n')
+            for blockLine in blockLines[:-1]:
+                for token in blockLine.split():
+                    yield line, token
+                line += 1
+            for token in blockLines[-1].split():
+                yield line, token
+    if partialToken:
+        yield line, partialToken
+
+def tokensEqual(ownToken, expectedToken, floatTolerance=0):
+    '''Compare two tokens, if floatTolerance is not 0 numbers can have an absolute or relative error of floatTolerance'''
+    if ownToken == expectedToken:
+        return True
+    if floatTolerance <= 0:
+        return False
+    try:
+        ownValue, expectedValue = float(ownToken), float(expectedToken)
+    except ValueError:
+        return False
+    return abs(ownValue - expectedValue) <= floatTolerance * max(1, abs(expectedValue))
+
+def compareOutputs(ownFile, expectedFile, floatTolerance=0):
+    '''Compare the whitespace separated tokens of the program output ownFile with expectedFile
+    Both files are streamed and the comparison stops at the first difference
+    returns None if the outputs are equal, if not the (line, token) where the first difference was found.
+    line is the line of the expected output, or of the program output if the expected output ended before'''
+    tokenPairs = zip_longest(readTokens(ownFile), readTokens(expectedFile))
+    for tokenNumber, (ownToken, expectedToken) in enumerate(tokenPairs, 1):
+        if ownToken is None or expectedToken is None:
+            return ((expectedToken or ownToken)[0], tokenNumber)
+        if not tokensEqual(ownToken[1], expectedToken[1], floatTolerance):
+            return (expectedToken[0], tokenNumber)
+    return None
+
+def findCases(currentDirectory, noOuts=False, cslog=None):
+    '''Locate the *.in* cases found in and below currentDirectory
+    The cases are sorted with stringSplitByNumbers, so they are always printed in the same order
+    returns a list of (caseNumber, fileInAddr, fileOutAddr) tuples, fileOutAddr is '' if no output was found'''
+    cases = []
     for fileInAddr in sorted(locate('*.in*', currentDirectory), key=stringSplitByNumbers):
         #Search if file exists
         try:
-            open(fileInAddr, 'r')
+            open(fileInAddr, 'r').close()
         except IOError:
             print('Failed to open file %s' % (fileInAddr), file = cslog)
             continue
 
         #Check fileOutAddr file exists
-        strOutput=''
+        fileOutAddr = ''
         if not noOuts:
             for posibleEnding in POSSIBLEFILEOUTEND:
                 fileOutAddr = fileInAddr.replace('.in', posibleEnding)
-                try:
-                    # Converts the output of the program to a string
-                    with open(fileOutAddr, 'r') as fileOut:
-                        strOutput = fileOut.read()
-                        break
-                except IOError:
-                    continue
+                if os.path.isfile(fileOutAddr):
+                    break
             else:
                 print('Failed to open file %s' % (fileOutAddr), file = cslog)
-
-        # If no alternate table has been loaded augment the number of test cases
-        if alternateValues == '':
-            testCases += 1
+                fileOutAddr = ''
 
         #Obtain the case number from the fileInAddr name 
         caseNumber = fileInAddr.replace(os.path.dirname(fileInAddr), '')
         caseNumber = re.sub(r'[^0-9]', '', caseNumber);
+        cases.append((caseNumber, fileInAddr, fileOutAddr))
+
+    return cases
+
+# perf events counted when profiling and the name of each one in the profile of a case
+PROFILEDEVENTS = {'cycles':'cycles', 'instructions':'instructions', 'cache-misses':'cacheMisses'}
+
+def profiledCommand(executable, profileDirectory):
+    '''Returns the command that runs executable under perf stat for the counters and perf record for the hot functions
+    Both write their data in profileDirectory, perf stat only counts the program and not perf record'''
+    return ['perf', 'record', '-q', '-F', '999', '-o', os.path.join(profileDirectory, 'perf.data'), '--',
+            'perf', 'stat', '-x,', '-o', os.path.join(profileDirectory, 'counters.csv'), '-e', ','.join(PROFILEDEVENTS), '--',
+            executable]
+
+def profileSettings(settings):
+    '''Returns the settings of the run under perf that obtains the profile of a case, the time and the verdict of the case
+    are taken from a run without perf. perf needs more memory and processes, so only the wall time is limited'''
+    return dict(settings, time=0, memory=0, outputLimit=0, wallTime=2*settings['wallTime'], profile=True)
+
+def readProfile(profileDirectory, hotFunctions=5):
+    '''Reads the data written by the command of profiledCommand
+    returns a dictionary with the cycles, instructions and cacheMisses, None if they could not be counted,
+    and hotFunctions, a list of the [function, percentage of the samples] that took most of the time'''
+    profile = dict((name, None) for name in PROFILEDEVENTS.values())
+    profile['hotFunctions'] = []
+    try:
+        with open(os.path.join(profileDirectory, 'counters.csv'), 'r') as countersFile:
+            for line in countersFile:
+                # Each line is value,unit,event,... the value is <not counted> or <not supported> if it is not available
+                fields = line.strip().split(',')
+                if len(fields) > 2 and fields[2].split(':')[0] in PROFILEDEVENTS and fields[0].isdigit():
+                    profile[PROFILEDEVENTS[fields[2].split(':')[0]]] = int(fields[0])
+    except IOError:
+        pass
+
+    try:
+        report = subprocess.run(['perf', 'report', '-i', os.path.join(profileDirectory, 'perf.data'), '--stdio', '-q',
+                                 '--no-children', '--sort', 'symbol'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=60)
+        for line in report.stdout.decode(errors='replace').splitlines():
+            match = re.match(r'\s*([0-9.]+)%\s+\[[.k]\]\s+(.+)$', line)
+            if match is not None and len(profile['hotFunctions']) < hotFunctions:
+                profile['hotFunctions'].append([match.group(2).strip(), float(match.group(1))])
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return profile
+
+def formatCount(count):
+    '''Formats a counter with a K, M or G suffix, or - if it could not be counted'''
+    if count is None:
+        return '-'
+    for divisor, suffix in [(1e9, 'G'), (1e6, 'M'), (1e3, 'K')]:
+        if count >= divisor:
+            return '%.2f%s' % (count / divisor, suffix)
+    return str(count)
+
+def formatMemory(memory):
+    '''Formats a peak memory in MB, or N/A if it could not be measured'''
+    return 'N/A' if memory is None else '%.1fMB' % (memory)
+
+def peakMemory(results):
+    '''Returns the biggest measured memory of the results, or None if none of them was measured'''
+    measured = [result['memory'] for result in results if result['memory'] is not None]
+    return max(measured) if measured else None
+
+def caseTime(result, settings):
+    '''Returns the time a case adds to the total time of a source, its cpu time or the time limit if it was TLE'''
+    if result['status'] == 'TLE' and settings['time'] > 0:
+        return settings['time']
+    return result['time']
+
+def printSlowestCases(results, count=5):
+    '''Prints the count cases that took longer with their counters and hot functions'''
+    profiledResults = sorted((result for result in results if 'profile' in result), key=lambda result: -result['time'])
+    if profiledResults == []:
+        return
+
+    print(bcolorsObject.HEADER + 'SLOWEST CASES' + bcolorsObject.ENDC)
+    for result in profiledResults[:count]:
+        profile = result['profile']
+        instructionsPerCycle = '-'
+        if profile['cycles'] and profile['instructions'] is not None:
+            instructionsPerCycle = '%.2f' % (profile['instructions'] / profile['cycles'])
+        print(bcolorsObject.OKBLUE + 'CASE %s:%s	TIME: %.2f	CYCLES: %s	INSTRUCTIONS: %s	IPC: %s	CACHE MISSES: %s' %
+              (result['caseNumber'], result['status'], result['time'], formatCount(profile['cycles']),
+               formatCount(profile['instructions']), instructionsPerCycle, formatCount(profile['cacheMisses'])) + bcolorsObject.ENDC)
+        for function, percentage in profile['hotFunctions']:
+            print('\t%6.2f%%  %s' % (percentage, function))
+
+def scratchDirectory(settings=None):
+    '''Returns the directory where the cases are run, a RAM backed tmpfs if one is available
+    If settings does not limit the output the temporary directory is used, in a tmpfs the pages of an output
+    of any size would be charged to the memory of the program'''
+    if settings is not None and settings['outputLimit'] <= 0:
+        return tempfile.gettempdir()
+    for directory in SCRATCHDIRECTORIES:
+        if os.path.isdir(directory) and os.access(directory, os.W_OK | os.X_OK):
+            return directory
+    return tempfile.gettempdir()
+
+def runChecker(checker, case, outputFile, settings):
+    '''Run the checker with the input, the expected output and the program output of case as arguments
+    The checker runs under the same limits as the program, it must print the score of the case
+    between 0 and 1 as the first token of its stdout. If it prints nothing the score is 1 if it returned 0
+    returns the score of the case, or None if the checker failed'''
+    caseNumber, fileInAddr, fileOutAddr = case
+    checkerOutput = outputFile + '.checker'
+    try:
+        with open(os.devnull, 'r') as fileIn, open(checkerOutput, 'w') as fileCheckerOut:
+            usage = runProcess([checker, fileInAddr, fileOutAddr, outputFile], fileIn, fileCheckerOut, settings,
+                               os.path.dirname(outputFile))
+        if usage['timedOut'] or usage['returnCode'] < 0:
+            return None
+        return readScore(checkerOutput, usage['returnCode'])
+    finally:
+        if os.path.exists(checkerOutput):
+            os.remove(checkerOutput)
+
+def readScore(scoreFile, returnCode):
+    '''Returns the score between 0 and 1 written as the first token of scoreFile by a checker or an interactor
+    If it wrote nothing the score is 1 if it returned 0, returns None if the score is not a number'''
+    try:
+        firstToken = next(readTokens(scoreFile), None)
+        if firstToken is None:
+            return 1.0 if returnCode == 0 else 0.0
+        return min(max(float(firstToken[1]), 0.0), 1.0)
+    except ValueError:
+        return None
+
+def judgeCase(executable, case, settings):
+    '''Run the executable with a single case and decide its status
+    case is a (caseNumber, fileInAddr, fileOutAddr) tuple as returned by findCases
+    Each case runs in a fresh directory in scratchDirectory where only a copy of its input is found,
+    its stdout is written next to that directory and everything is removed once the case is judged
+    settings is the dictionary with the limits and the evaluation mode, with profile the result has the profile of the case
+    If settings has an interactor the case is judged by judgeInteractiveCase
+    returns a dictionary with the caseNumber, status, score, cpu time, wall time and peak memory used by the case'''
+    if settings['interactor'] != '':
+        return judgeInteractiveCase(executable, case, settings)
+
+    caseNumber, fileInAddr, fileOutAddr = case
+    caseDirectory = tempfile.mkdtemp(prefix='cs.', dir=scratchDirectory(settings))
+    try:
+        runDirectory, outputFile = os.path.join(caseDirectory, 'run'), os.path.join(caseDirectory, 'cs.out')
+        os.mkdir(runDirectory)
+        fileInCopy = os.path.join(runDirectory, os.path.basename(fileInAddr))
+        shutil.copyfile(fileInAddr, fileInCopy)
+
+        command, runSettings = os.path.abspath(executable), dict(settings, profile=False)
+        with open(fileInCopy, 'r') as fileIn, open(outputFile, 'w') as fileTemporaryOut:
+            usage = runProcess(command, fileIn, fileTemporaryOut, runSettings, runDirectory)
+        result = judgeOutput(case, outputFile, usage, runSettings)
+
+        # The profile is taken from another run, so the overhead of perf does not change the time and the verdict
+        if settings['profile']:
+            shutil.copyfile(fileInAddr, fileInCopy)
+            with open(fileInCopy, 'r') as fileIn, open(os.devnull, 'w') as fileOut:
+                runProcess(profiledCommand(command, caseDirectory), fileIn, fileOut, profileSettings(settings), runDirectory)
+            result['profile'] = readProfile(caseDirectory)
+        return result
+    finally:
+        shutil.rmtree(caseDirectory, ignore_errors=True)
+
+def judgeInteractiveCase(executable, case, settings):
+    '''Run the executable with a single case of an interactive problem, it talks with settings['interactor'] through pipes
+    The interactor receives the input, the expected output and the file where it writes the score as arguments,
+    its stdout is the stdin of the program and its stdin is the stdout of the program, so the data is never
+    copied by this process. Both run under the limits in settings and the program runs in an empty directory
+    returns the same dictionary as judgeCase'''
+    caseDirectory = tempfile.mkdtemp(prefix='cs.', dir=scratchDirectory())
+    try:
+        runDirectory, scoreFile = os.path.join(caseDirectory, 'run'), os.path.join(caseDirectory, 'cs.score')
+        os.mkdir(runDirectory)
+
+        command, runSettings = os.path.abspath(executable), dict(settings, profile=False)
+        usage, interactorUsage = runInteraction(command, case, runSettings, runDirectory, scoreFile)
+        result = judgeInteraction(case, usage, interactorUsage, scoreFile, runSettings)
+
+        # The profile is taken from another interaction, so the overhead of perf does not change the time and the verdict
+        if settings['profile']:
+            runInteraction(profiledCommand(command, caseDirectory), case, profileSettings(settings), runDirectory, scoreFile + '.profile')
+            result['profile'] = readProfile(caseDirectory)
+        return result
+    finally:
+        shutil.rmtree(caseDirectory, ignore_errors=True)
+
+def runInteraction(command, case, settings, runDirectory, scoreFile):
+    '''Runs command in runDirectory connected by pipes to settings['interactor'], which writes the score in scoreFile
+    returns the usage of the program and of the interactor'''
+    caseNumber, fileInAddr, fileOutAddr = case
+    # The interactor is not pinned, so a case never waits for two free cores
+    interactorSettings = dict(settings, pin=False, profile=False)
+    interactorCommand = [settings['interactor'], fileInAddr, fileOutAddr if fileOutAddr != '' else os.devnull, scoreFile]
+
+    # Both ends of the pipes are closed here once the processes have them, so each one sees the other finish
+    toProgram, toInteractor = os.pipe(), os.pipe()
+    try:
+        program = startProcess(command, toProgram[0], toInteractor[1], settings, runDirectory)
+        try:
+            interactor = startProcess(interactorCommand, toInteractor[0], toProgram[1], interactorSettings, os.path.dirname(scoreFile))
+        except (OSError, subprocess.SubprocessError):
+            killProcessGroup(program['process'].pid)
+            waitProcess(program)
+            raise
+    finally:
+        for pipeEnd in toProgram + toInteractor:
+            os.close(pipeEnd)
+
+    return waitInteraction(program, interactor)
+
+def waitInteraction(program, interactor):
+    '''Waits for the program and the interactor started by startProcess at the same time,
+    the interactor is waited in another thread and the program in this one
+    Each one is killed by its own watchdog, so a program and an interactor waiting for each other end at the wall time limit
+    returns the usage of the program and of the interactor'''
+    interactorUsage = []
+    interactorThread = threading.Thread(target=lambda: interactorUsage.append(waitProcess(interactor)))
+    interactorThread.start()
+    try:
+        usage = waitProcess(program)
+    finally:
+        interactorThread.join()
+    if interactorUsage == []:
+        raise OSError('Could not wait for the interactor')
+    return usage, interactorUsage[0]
+
+def judgeInteraction(case, usage, interactorUsage, scoreFile, settings):
+    '''Decide the status of an interactive case from the usage of the program and the interactor and the score it wrote
+    The limits of the program are checked first, then the verdict of the interactor is used. The program may be
+    killed by SIGPIPE when the interactor rejects it early, so it is only RTE if the interactor accepted it'''
+    caseNumber, fileInAddr, fileOutAddr = case
+    result = {'caseNumber':caseNumber, 'status':'', 'score':0.0, 'time':usage['cpuTime'],
+              'wallTime':usage['wallTime'], 'memory':usage['memory'], 'mismatch':None}
+
+    programStatus = usageStatus(usage, settings)
+    if programStatus in ['TLE', 'MLE']:
+        result['status'] = programStatus
+        return result
+
+    score = None
+    if not interactorUsage['timedOut'] and interactorUsage['returnCode'] >= 0 and usageStatus(interactorUsage, settings) in ['', 'RTE']:
+        score = readScore(scoreFile, interactorUsage['returnCode'])
+    if score is None:
+        result['status'] = 'JE'
+    elif score < 1:
+        result['score'] = score
+        result['status'] = 'WA' if score == 0 else 'PA'
+    elif programStatus != '':
+        result['status'] = programStatus
+    else:
+        result['score'] = 1.0
+        result['status'] = 'OK'
+    return result
+
+def usageStatus(usage, settings, outputSize=0):
+    '''Returns the status of a process given its usage returned by runProcess and the size of its output,
+    TLE, MLE, OLE or RTE if it broke a limit or failed, or '' if it finished correctly
+    A time, wall time, memory or output limit of 0 in settings is not checked'''
+    # TLE is decided by cpu time, the wall time has its own limit
+    if usage['memoryExceeded']:
+        return 'MLE'
+    elif usage['timedOut'] or usage['returnCode'] == -signal.SIGXCPU:
+        return 'TLE'
+    elif ((settings['time'] > 0 and usage['cpuTime'] > settings['time']) or
+          (settings['wallTime'] > 0 and usage['wallTime'] > settings['wallTime'])):
+        return 'TLE'
+    elif usage['returnCode'] == -signal.SIGXFSZ or (settings['outputLimit'] > 0 and
+                                                     outputSize > settings['outputLimit']*1024*1024):
+        return 'OLE'
+    elif settings['memory'] > 0 and usage['memoryMeasured'] and usage['memory'] > settings['memory']:
+        return 'MLE'
+    elif int(usage['returnCode']) != 0:
+        if int(usage['returnCode']) == -1:
+            print(bcolorsObject.FAIL + 'Limits are incorrect killing execution' + bcolorsObject.ENDC, file = stderr)
+            exit(-1)
+        return 'RTE'
+    return ''
+
+def judgeOutput(case, outputFile, usage, settings):
+    '''Decide the status of a case from the usage returned by runProcess and the outputFile written by the program'''
+    caseNumber, fileInAddr, fileOutAddr = case
+    if fileOutAddr == '':
+        fileOutAddr = os.devnull
+
+    result = {'caseNumber':caseNumber, 'status':'', 'score':0.0, 'time':usage['cpuTime'],
+              'wallTime':usage['wallTime'], 'memory':usage['memory'], 'mismatch':None,
+              'outputSize':os.path.getsize(outputFile)}
+
+    result['status'] = usageStatus(usage, settings, result['outputSize'])
+    if result['status'] != '':
+        return result
+
+    # Check if the result from the case is wrong or right
+    if settings['noOuts']:
+        result['status'] = 'NP'
+    elif settings['checker'] != '':
+        score = runChecker(settings['checker'], case, outputFile, settings)
+        if score is None:
+            result['status'] = 'JE'
+        else:
+            result['score'] = score
+            result['status'] = 'OK' if score == 1 else ('WA' if score == 0 else 'PA')
+        return result
+    elif settings['multipleSolutions']:
+        # Use regex sub to remove all whitespace from the string
+        with open(outputFile, 'r') as fileTemporaryOut, open(fileOutAddr, 'r') as fileOut:
+            strOwnProgram = re.sub(r'\s', '', fileTemporaryOut.read())
+            strOutput = re.sub(r'\s', '', fileOut.read())
+        result['status'] = 'NP' if strOwnProgram in strOutput else 'WA' #If output file string is in the case string
+    else:
+        result['mismatch'] = compareOutputs(outputFile, fileOutAddr, settings['floatTolerance'])
+        result['status'] = 'OK' if result['mismatch'] is None else 'WA'
+
+    if result['status'] in ['OK', 'NP']:
+        result['score'] = 1.0
+    return result
+
+def loadGroups(groupsFile):
+    '''Reads the subtask definition file, each line has the POINTS of the group followed by its case numbers.
+    Cases can be given as ranges, for example: 30 1 2 5-9. Lines starting with # are ignored
+    returns a list of (points, set of case numbers) tuples, raises ValueError if a line is invalid'''
+    groups = []
+    with open(groupsFile, 'r') as fileGroups:
+        for line in fileGroups:
+            line = line.split('#')[0].split()
+            if line == []:
+                continue
+            caseNumbers = set()
+            for caseRange in line[1:]:
+                first, separator, last = caseRange.partition('-')
+                caseNumbers.update(range(int(first), int(last if separator else first) + 1))
+            groups.append((float(line[0]), caseNumbers))
+    return groups
+
+def loadJsonFile(fileName, default):
+    '''Returns the data saved as json in fileName, or default if there is no valid file'''
+    try:
+        with open(fileName, 'r') as jsonFile:
+            return json.load(jsonFile)
+    except (IOError, ValueError):
+        return default
+
+def saveJsonFile(fileName, data, description):
+    '''Saves data as json in fileName, a temporary file is replaced so the file is never left half written
+    If it could not be saved a warning is shown with the description of the data'''
+    temporaryFile = fileName + '.%d' % (os.getpid())
+    try:
+        with open(temporaryFile, 'w') as jsonFile:
+            json.dump(data, jsonFile)
+        os.replace(temporaryFile, fileName)
+    except IOError:
+        print(bcolorsObject.WARNING + 'Could not save %s' % (description) + bcolorsObject.ENDC, file = stderr)
+
+def loadResultsCache():
+    '''Returns the dictionary of case results saved in RESULTSCACHEFILE, it is empty if there is no valid file'''
+    return loadJsonFile(RESULTSCACHEFILE, {})
+
+def saveResultsCache(resultsCache):
+    '''Saves the case results in RESULTSCACHEFILE'''
+    saveJsonFile(RESULTSCACHEFILE, resultsCache, 'the results cache')
+
+def loadCaseTimes():
+    '''Returns the dictionary with the last cpu time of each case input saved in CASETIMESFILE, keyed by the hash of the input'''
+    return loadJsonFile(CASETIMESFILE, {})
+
+def saveCaseTimes(caseTimes):
+    '''Saves the times of the cases in CASETIMESFILE'''
+    saveJsonFile(CASETIMESFILE, caseTimes, 'the times of the cases')
+
+def loadValidations():
+    '''Returns the set of inputs that passed a validator saved in VALIDATIONSFILE, keyed by validationKey'''
+    validations = loadJsonFile(VALIDATIONSFILE, [])
+    return set(validations) if isinstance(validations, list) else set()
+
+def saveValidations(validations):
+    '''Saves the inputs that passed a validator in VALIDATIONSFILE'''
+    saveJsonFile(VALIDATIONSFILE, sorted(validations), 'the validated cases')
+
+def validatorHashKey(validator, settings):
+    '''Returns the hash used in validationKey for a validator, it depends on its contents and on the limits it runs with'''
+    limits = json.dumps([settings['time'], settings['wallTime'], settings['memory'], settings['outputLimit']])
+    return hashFile(validator) + limits
+
+def validationKey(validatorHash, fileInAddr):
+    '''Returns the key of a validated input, it depends on the hash of the validator returned by validatorHashKey and of the input'''
+    return hashlib.sha256((validatorHash + '\0' + cachedHashFile(fileInAddr)).encode()).hexdigest()
+
+def validateInput(validator, fileInAddr, settings, validatorHash='', validations=None):
+    '''Runs the validator with fileInAddr as stdin under the limits in settings, the input is valid if the validator returns 0
+    An input whose validator broke a limit or crashed is invalid
+    validations is the set returned by loadValidations, the inputs found there are not validated again
+    and the ones that pass are added to it
+    returns None if the input is valid, if not the first line printed by the validator, its return code or the limit broken'''
+    if validations is not None:
+        cacheKey = validationKey(validatorHash, fileInAddr)
+        if cacheKey in validations:
+            return None
+
+    validatorSettings = dict(settings, profile=False)
+    with open(fileInAddr, 'rb') as fileIn, tempfile.TemporaryFile(dir=scratchDirectory()) as fileValidatorOut:
+        usage = runProcess([validator], fileIn, fileValidatorOut, validatorSettings, fileErr=subprocess.STDOUT)
+        outputSize = os.fstat(fileValidatorOut.fileno()).st_size
+        fileValidatorOut.seek(0)
+        message = fileValidatorOut.readline().decode(errors='replace').strip()
+    status = usageStatus(usage, validatorSettings, outputSize)
+    if status == 'RTE':
+        return message if message != '' else 'the validator returned %d' % (usage['returnCode'])
+    elif status != '':
+        return 'the validator got %s' % (status)
+
+    if validations is not None:
+        validations.add(cacheKey)
+    return None
+
+def validateCases(validator, inputFiles, settings, jobs=1, useCache=True):
+    '''Validates all the inputFiles with the validator under the limits in settings, jobs of them at the same time
+    The validation stops at the first invalid input found, the inputs that were not started are not validated
+    useCache skips the inputs that already passed the same validator, they are saved in VALIDATIONSFILE
+    returns True if every input is valid'''
+    validations = loadValidations() if useCache else None
+    validatorHash = validatorHashKey(validator, settings) if useCache else ''
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    futures = dict((executor.submit(validateInput, validator, fileInAddr, settings, validatorHash, validations), fileInAddr)
+                   for fileInAddr in inputFiles)
+
+    invalidInput = None
+    for future in as_completed(futures):
+        error = future.result()
+        if error is not None:
+            invalidInput = futures[future]
+            print(bcolorsObject.FAIL + 'Invalid case %s: %s' % (invalidInput, error) + bcolorsObject.ENDC, file = stderr)
+            break
+    executor.shutdown(cancel_futures=True)
+
+    if validations is not None:
+        saveValidations(validations)
+    if invalidInput is None:
+        print(bcolorsObject.DEBUG + 'Validated %d cases' % (len(inputFiles)) + bcolorsObject.ENDC)
+    return invalidInput is None
+
+def resultsCacheKey(executableHash, case, settingsKey):
+    '''Returns the key of the results cache for a case
+    It depends on the hash of the executable, of the input and expected output of the case, and on the settings used'''
+    caseNumber, fileInAddr, fileOutAddr = case
+    cacheKey = hashlib.sha256()
+    for part in [executableHash, cachedHashFile(fileInAddr), cachedHashFile(fileOutAddr) if fileOutAddr != '' else '', settingsKey]:
+        cacheKey.update(part.encode() + b'\0')
+    return cacheKey.hexdigest()
+
+def loadSuite(currentDirectory, noOuts=False, alternateValues='', groupsFile='', cslog=None):
+    '''Scans the cases found in currentDirectory, the suite can then be evaluated with any number of executables
+    alternateValues is the table with the value of each case, groupsFile is the subtask definition read by loadGroups
+    returns a dictionary with the cases, their values, the groups and the groups of each case,
+    or None if the groups could not be loaded'''
+    # If specified, load the alternate values table
+    if alternateValues != '':
+        try:
+            fileValues = open(alternateValues, 'r')
+        except IOError:
+            print(bcolorsObject.FAIL + 'Failed to open table\n' + bcolorsObject.ENDC, file = stderr)
+            alternateValues = ''
+
+    # If specified, load the subtasks
+    groups = []
+    if groupsFile != '':
+        try:
+            groups = loadGroups(groupsFile)
+        except IOError:
+            print(bcolorsObject.FAIL + 'Failed to open groups file %s' % (groupsFile) + bcolorsObject.ENDC, file = stderr)
+            return None
+        except ValueError:
+            print(bcolorsObject.FAIL + 'Invalid groups file %s' % (groupsFile) + bcolorsObject.ENDC, file = stderr)
+            return None
+
+    # For each *.in* file found in the working directory sort the files
+    cases = findCases(currentDirectory, noOuts, cslog)
 
-        #Read values from table if specified
+    #Read values from table if specified
+    values = []
+    for case in cases:
         value=1
         if alternateValues!='' :
             try:
                 value = float(fileValues.readline())
             except ValueError:
                 print(bcolorsObject.FAIL + 'Invalid value from table\nTERMINATING' + bcolorsObject.ENDC, file = stderr)
+                cases = cases[:len(values)]
                 break
+        values.append(value)
+    if alternateValues != '':
+        fileValues.close()
+
+    # The groups each case belongs to
+    caseGroups = [[groupIndex for groupIndex, (points, caseNumbers) in enumerate(groups) if int(case[0]) in caseNumbers]
+                  for case in cases]
+    for case, groupIndexes in zip(cases, caseGroups):
+        if groups and groupIndexes == []:
+            print('Case %s does not belong to any group' % (case[1]), file = cslog)
+
+    return {'cases':cases, 'values':values, 'groups':groups, 'caseGroups':caseGroups,
+            'alternateValues':alternateValues != ''}
+
+def scheduleCases(executable, suite, settings, executor=None, resultsCache=None, retime=False, runAllCases=False,
+                  judge=judgeCase, caseTimes=None):
+    '''Starts the evaluation of all the cases of the suite with executable
+    If executor is None each case is judged when its result is requested, if not all the cases are submitted to the executor
+    resultsCache is the dictionary returned by loadResultsCache, if it is None the cache is not used
+    retime judges the cases again even if they are cached
+    runAllCases evaluates the cases of a group even after one of them failed, by default they are skipped
+    judge runs a single case, it is judgeCase or the judgeCase of a WorkerPool
+    caseTimes is the dictionary returned by loadCaseTimes, the cases that took longer before are submitted first
+    so a slow case does not end up running alone at the end, it is updated with the new times
+    returns an iterator of the results in the order of the cases'''
+    cases, groups, caseGroups = suite['cases'], suite['groups'], suite['caseGroups']
+    failedGroups = set()
+
+    # The cached results are only valid for the same executable, checker, interactor and settings
+    if resultsCache is not None:
+        executableHash = hashFile(executable)
+        checker, interactor = settings['checker'], settings['interactor']
+        settingsKey = json.dumps(dict(settings, checker=hashFile(checker) if checker != '' else '',
+                                      interactor=hashFile(interactor) if interactor != '' else ''), sort_keys=True)
+
+    def evaluateCase(index):
+        '''Returns the result of the case in the position index. Cases whose groups already failed are skipped'''
+        if groups and not runAllCases and caseGroups[index] and all(groupIndex in failedGroups for groupIndex in caseGroups[index]):
+            return {'caseNumber':cases[index][0], 'status':'SKP', 'score':0.0, 'time':0.0,
+                    'wallTime':0.0, 'memory':0.0, 'mismatch':None}
+
+        result = cachedCase(index)
+        if result['score'] == 0:
+            failedGroups.update(caseGroups[index])
+        if caseTimes is not None:
+            caseTimes[cachedHashFile(cases[index][1])] = result['time']
+        return result
+
+    def cachedCase(index):
+        '''Returns the cached result of the case in the position index, if there is none the case is judged'''
+        if resultsCache is None:
+            return judge(executable, cases[index], settings)
+
+        cacheKey = resultsCacheKey(executableHash, cases[index], settingsKey)
+        if not retime and cacheKey in resultsCache:
+            result = dict(resultsCache[cacheKey], caseNumber=cases[index][0], cached=True)
+            if result['mismatch'] is not None:
+                result['mismatch'] = tuple(result['mismatch'])
+            return result
+
+        result = judge(executable, cases[index], settings)
+        if result['status'] != 'JE':
+            resultsCache[cacheKey] = result
+        return result
+
+    # The results are always received in the order of the cases, even if they finished out of order
+    if executor is None:
+        return map(evaluateCase, range(len(cases)))
+    submitOrder = range(len(cases))
+    if caseTimes is not None:
+        submitOrder = sorted(submitOrder, key=lambda index: -caseTimes.get(cachedHashFile(cases[index][1]), 0))
+    futures = dict((index, executor.submit(evaluateCase, index)) for index in submitOrder)
+    return (futures[index].result() for index in range(len(cases)))
+
+def scoreSuite(suite, caseScores, verbose=False):
+    '''Returns the total score of the suite given the score of each case.
+    Without groups or alternate values the score is the percentage of the cases
+    A group is worth its points times the lowest score of its cases
+    returns None if there are no cases to score'''
+    if suite['groups']:
+        total = 0
+        for groupIndex, (points, caseNumbers) in enumerate(suite['groups']):
+            groupScores = [score for score, groupIndexes in zip(caseScores, suite['caseGroups']) if groupIndex in groupIndexes]
+            groupTotal = points*min(groupScores) if groupScores else 0
+            total += groupTotal
+            if verbose:
+                print(bcolorsObject.OKBLUE + 'GROUP %d: %.2f/%.2f' % (groupIndex + 1, groupTotal, points) + bcolorsObject.ENDC)
+        return total
+
+    total = sum(value*score for value, score in zip(suite['values'], caseScores))
+    if suite['alternateValues']:
+        return total
+    if len(caseScores) == 0:
+        return None
+    return total*100/len(caseScores)
+
+def evaluate(sourceFile, currentDirectory, settings, verbose=False, alternateValues='', jobs=1, useCache=True, retime=False,
+             groupsFile='', runAllCases=False, report=None, suite=None, resultsCache=None, pool=None):
+    '''Evaluate the source file with the .in cases found in currentDirectory
+    settings is the dictionary returned by limitSettings with the limits and the evaluation mode of each case
+    Verbose mode is true by default, if set to false, the program will only print errors and the end results
+    alternateValues is a specialized mode if some cases are worth more than others
+    jobs is the number of cases evaluated at the same time, each one runs in its own scratch directory
+    useCache reuses the result of the cases that were already evaluated with the same executable, files and limits
+    retime runs every case again even if it is cached, the new results are stored in the cache
+    groupsFile is the subtask definition read by loadGroups, a group is worth its points only if all its cases pass
+    runAllCases evaluates the cases of a group even after one of them failed, by default they are skipped
+    report is a JsonReport or JunitReport where each case is written when its result is received
+    suite and resultsCache are used instead of scanning the cases and loading the cache if they are given
+    pool is a WorkerPool that runs the cases in the remote workers and in jobs local slots
+    With profile in settings the slowest cases are printed with their counters and hot functions
+    returns the total score, or None if no cases were evaluated'''
+    # Initialization of local variables
+    totalTime = 0
+    executable, extension = os.path.splitext(sourceFile)
 
-        # Specify route for the executable
-        if not routeSpecified(executable):
-            executable='./'+executable;
-
-        # fileOut opens a temporary file in the current directory for the stdout to be redirected
-        with open(fileInAddr, 'r') as fileIn, open('cs.out', 'w') as fileTemporaryOut:
-            # Start the program evaluation. timeStart and timeUsed are used to determine how much the program took
-            timeStart = time.time()
-            evaluationSubprocess = subprocess.Popen(executable, stdin=fileIn, stdout=fileTemporaryOut, preexec_fn=processLimit)
-            evaluationSubprocess.wait()
-            evaluationReturnCode = evaluationSubprocess.returncode
-            timeUsed = time.time() - timeStart
-
-        # Check if in the execution an error was found.
-        caseStatus = ''
-        if timeUsed > maximumTime:
-            caseStatus = 'TLE'
-        elif int(evaluationReturnCode) != 0:
-            if int(evaluationReturnCode) == -1:
-                print(bcolorsObject.FAIL + 'Limits are incorrect killing execution' + bcolorsObject.ENDC, file = stderr)
-                exit(-1)
-            if int(evaluationReturnCode) == -9:
-                caseStatus = 'MLE'
-            else:
-                caseStatus = 'RTE'
+    # Open a loging file for the errors
+    try:
+        cslog = open('.cslog', 'a')
+    except IOError:
+        print(bcolorsObject.FAIL + 'Will not log errors\n' + bcolorsObject.ENDC, file = stderr)
+        return
 
-        # If execution errors were found, send the correct exit code
-        totalTime += float(timeUsed);
-        if caseStatus != '':
-            if caseStatus == 'TLE':
-                totalTime += float(maximumTime - timeUsed);
+    if suite is None:
+        suite = loadSuite(currentDirectory, settings['noOuts'], alternateValues, groupsFile, cslog)
+    if suite is None:
+        return
+
+    # Specify route for the executable
+    if not routeSpecified(executable):
+        executable='./'+executable;
+
+    if resultsCache is None and useCache:
+        resultsCache = loadResultsCache()
+    judge, slots = (pool.judgeCase, pool.size()) if pool is not None else (judgeCase, jobs)
+    executor = ThreadPoolExecutor(max_workers=slots) if slots != 1 else None
+    caseTimes = loadCaseTimes() if executor is not None else None
+    results = scheduleCases(executable, suite, settings, executor, resultsCache, retime, runAllCases, judge, caseTimes)
+
+    if report is not None:
+        report.startSuite(sourceFile)
+
+    caseScores, caseStatuses, caseResults = [], {}, []
+    for result, case in zip(results, suite['cases']):
+        caseNumber, caseStatus, timeUsed = result['caseNumber'], result['status'], result['time']
+        caseScores.append(result['score'])
+        caseResults.append(result)
+        caseStatuses[caseStatus] = caseStatuses.get(caseStatus, 0) + 1
+        if report is not None:
+            report.writeCase(result, case[1])
+
+        if caseStatus == 'SKP':
             if verbose:
-                print(bcolorsObject.FAIL + 'CASE %s:%s\t\t' % (caseNumber, caseStatus) +
-                      bcolorsObject.OKBLUE + 'TIME ELAPSED: %.02f' % (float(timeUsed)) + bcolorsObject.ENDC)
+                print(bcolorsObject.DEBUG + 'CASE %s:%s' % (caseNumber, caseStatus) + bcolorsObject.ENDC)
             continue
 
-        # Opens the output file from the program
-        try:
-            with open('cs.out', 'r') as fileTemporaryOut:
-                strOwnProgram = fileTemporaryOut.read()
-        except IOError:
-            print('Error opening cs.out', file = cslog)
-            continue
+        usageText = 'TIME ELAPSED: %.2f\tWALL TIME: %.2f\tMEMORY: %s' % (timeUsed, result['wallTime'], formatMemory(result['memory']))
+        if result['mismatch'] is not None:
+            usageText += '\tFIRST DIFFERENCE: LINE %d TOKEN %d' % result['mismatch']
+        if result.get('cached', False):
+            usageText += '\tCACHED'
 
-        # Use regex sub to remove all whitespace from the string
-        strOwnProgram = re.sub(r'\s', '', strOwnProgram)
-        strOutput = re.sub(r'\s', '', strOutput)
+        # If execution errors were found, send the correct exit code
+        totalTime += caseTime(result, settings)
+        if caseStatus in ['TLE', 'MLE', 'OLE', 'RTE', 'JE']:
+            if verbose:
+                print(bcolorsObject.FAIL + 'CASE %s:%s\t\t' % (caseNumber, caseStatus) +
+                      bcolorsObject.OKBLUE + usageText + bcolorsObject.ENDC)
+            continue
 
-        # Check if the result from the case is wrong or right
-        if (multipleSolutions and strOwnProgram in strOutput) or strOwnProgram == strOutput or noOuts: #If output file string is in the case string
+        if caseStatus in ['OK', 'NP']:
             colorOut = bcolorsObject.OKGREEN
-            caseStatus = 'OK'
-            if noOuts or multipleSolutions:
-                caseStatus = 'NP'
-            total+=value
+        elif caseStatus == 'PA': #If the checker gave a partial score
+            colorOut = bcolorsObject.WARNING
+            usageText += '\tSCORE: %.2f' % (result['score'])
         else: #If not case is wrong
             colorOut = bcolorsObject.FAIL
-            caseStatus = 'WA'
 
         # If verbose mode
         if verbose:
             print(colorOut + 'CASE %i:%s\t\t' % (int(caseNumber), caseStatus) +
-                  bcolorsObject.OKBLUE + 'TIME ELAPSED: %.2f' % (float(timeUsed)) + bcolorsObject.ENDC)
+                  bcolorsObject.OKBLUE + usageText + bcolorsObject.ENDC)
+
+    if executor is not None:
+        executor.shutdown()
+        saveCaseTimes(caseTimes)
+
+    if resultsCache is not None:
+        saveResultsCache(resultsCache)
 
-    if testCases > 0 or alternateValues:
-        if alternateValues == '':
-            total = total*100/testCases
+    total = scoreSuite(suite, caseScores, verbose)
+    if total is not None:
+        if report is not None:
+            report.writeSummary({'score':total, 'totalTime':totalTime, 'cases':len(caseScores), 'statuses':caseStatuses})
         if verbose:
             print(bcolorsObject.HEADER + 'TOTAL SCORE: %d\t\t' % (total) +
                   bcolorsObject.HEADER + 'TOTAL TIME ELAPSED: %.2f' % (totalTime) + bcolorsObject.ENDC)
         else:
             print(total)
+        if settings['profile']:
+            printSlowestCases(caseResults)
     else:
         print(bcolorsObject.FAIL + 'Error: Could not find test cases for %s' % (sourceFile) + bcolorsObject.ENDC)
+    return total
+
+def evaluateBatch(executables, currentDirectory, settings, jobs=1, alternateValues='', groupsFile='',
+                  useCache=True, retime=False, runAllCases=False, report=None, suite=None, resultsCache=None, pool=None):
+    '''Evaluate many executables with the same suite, for example all the submissions of a contest
+    The suite is scanned once and the (executable, case) pairs share a single pool of jobs workers
+    executables is a list of (sourceFile, executable) tuples, settings is the dictionary returned by limitSettings
+    suite and resultsCache are used instead of scanning the cases and loading the cache if they are given
+    pool is a WorkerPool that runs the cases in the remote workers and in jobs local slots
+    Prints a scoreboard with the status of each case for each source and its total score
+    returns the list of total scores of the executables'''
+    try:
+        cslog = open('.cslog', 'a')
+    except IOError:
+        print(bcolorsObject.FAIL + 'Will not log errors\n' + bcolorsObject.ENDC, file = stderr)
+        return
+
+    if suite is None:
+        suite = loadSuite(currentDirectory, settings['noOuts'], alternateValues, groupsFile, cslog)
+    if suite is None:
+        return
+    if suite['cases'] == []:
+        print(bcolorsObject.FAIL + 'Error: Could not find test cases in %s' % (currentDirectory) + bcolorsObject.ENDC)
+        return
+
+    # Every executable submits its cases to the pool before any result is waited, so the workers are never idle
+    if resultsCache is None and useCache:
+        resultsCache = loadResultsCache()
+    judge, slots = (pool.judgeCase, pool.size()) if pool is not None else (judgeCase, jobs)
+    executor, caseTimes = ThreadPoolExecutor(max_workers=slots), loadCaseTimes()
+    schedules = [scheduleCases(executable, suite, settings, executor, resultsCache, retime, runAllCases, judge, caseTimes)
+                 for sourceFile, executable in executables]
+
+    sourceWidth = max(len('SOURCE'), max(len(sourceFile) for sourceFile, executable in executables))
+    print(bcolorsObject.HEADER + 'SOURCE'.ljust(sourceWidth) + ' ' +
+          ' '.join(case[0].rjust(4) for case in suite['cases']) + '  TOTAL' + bcolorsObject.ENDC)
+
+    totals = []
+    for (sourceFile, executable), results in zip(executables, schedules):
+        if report is not None:
+            report.startSuite(sourceFile)
+
+        caseScores, caseStatuses, totalTime, row = [], {}, 0, []
+        for result, case in zip(results, suite['cases']):
+            caseScores.append(result['score'])
+            caseStatuses[result['status']] = caseStatuses.get(result['status'], 0) + 1
+            totalTime += caseTime(result, settings)
+            row.append(result['status'].rjust(4))
+            if report is not None:
+                report.writeCase(result, case[1])
+
+        total = scoreSuite(suite, caseScores)
+        totals.append(total)
+        if report is not None:
+            report.writeSummary({'score':total, 'totalTime':totalTime, 'cases':len(caseScores), 'statuses':caseStatuses})
+        print(sourceFile.ljust(sourceWidth) + ' ' + ' '.join(row) + bcolorsObject.HEADER + '  %5.1f' % (total) + bcolorsObject.ENDC)
+
+    executor.shutdown()
+    saveCaseTimes(caseTimes)
+    if resultsCache is not None:
+        saveResultsCache(resultsCache)
+    return totals
+
+def compareBuilds(builds, currentDirectory, settings, jobs=1, alternateValues='', groupsFile='',
+                  useCache=True, pool=None):
+    '''Evaluates the builds of a flag matrix with the same suite and prints a table to compare them
+    builds is the list returned by flagMatrixBuilds, the ones whose executable is '' failed to compile
+    Every case of every build is run, the cpu time of the cases is used for the comparison, so the limits of the
+    problem can be set from the slowest case of the reference solution under each compiler and flags
+    The cases are always timed again, cached times would not be a benchmark, useCache only stores the new results
+    settings is the dictionary returned by limitSettings, pool is a WorkerPool that runs the cases in the remote workers
+    returns the list with the results of the cases of each build, it is None for the builds that were not evaluated'''
+    try:
+        cslog = open('.cslog', 'a')
+    except IOError:
+        print(bcolorsObject.FAIL + 'Will not log errors\n' + bcolorsObject.ENDC, file = stderr)
+        return
+
+    suite = loadSuite(currentDirectory, settings['noOuts'], alternateValues, groupsFile, cslog)
+    if suite is None:
+        return
+    if suite['cases'] == []:
+        print(bcolorsObject.FAIL + 'Error: Could not find test cases in %s' % (currentDirectory) + bcolorsObject.ENDC)
+        return
+
+    # The builds share the pool of jobs workers like evaluateBatch, with jobs 1 every case runs alone
+    resultsCache = loadResultsCache() if useCache else None
+    judge, slots = (pool.judgeCase, pool.size()) if pool is not None else (judgeCase, jobs)
+    executor, caseTimes = ThreadPoolExecutor(max_workers=slots), loadCaseTimes()
+    schedules = [scheduleCases(os.path.abspath(build['executable']), suite, settings, executor, resultsCache, True, True,
+                               judge, caseTimes) if build['executable'] != '' else None for build in builds]
+    buildResults = [list(results) if results is not None else None for results in schedules]
+    executor.shutdown()
+    saveCaseTimes(caseTimes)
+    if resultsCache is not None:
+        saveResultsCache(resultsCache)
+
+    labelWidth = max(len('BUILD'), max(len(build['label']) for build in builds))
+    print(bcolorsObject.HEADER + 'BUILD'.ljust(labelWidth) + '  SCORE  TOTAL TIME  MAX TIME  SLOWEST CASE  MEMORY  SPEEDUP  STATUSES' +
+          bcolorsObject.ENDC)
+    baseTime = None
+    for build, results in zip(builds, buildResults):
+        if results is None:
+            print(bcolorsObject.FAIL + build['label'].ljust(labelWidth) + '  COMPILATION ERROR' + bcolorsObject.ENDC)
+            continue
+
+        # The speedup is relative to the total time of the first build that compiled
+        totalTime = sum(caseTime(result, settings) for result in results)
+        if baseTime is None:
+            baseTime = totalTime
+        slowest = max(results, key=lambda result: result['time'])
+        statuses = {}
+        for result in results:
+            statuses[result['status']] = statuses.get(result['status'], 0) + 1
+        total = scoreSuite(suite, [result['score'] for result in results])
+        colorOut = bcolorsObject.OKGREEN if list(statuses) in [['OK'], ['NP']] else bcolorsObject.WARNING
+        print(colorOut + build['label'].ljust(labelWidth) + '  %5.1f  %10.3f  %8.3f  %12s  %6s  %6.2fx  %s' %
+              (total, totalTime, slowest['time'], slowest['caseNumber'], formatMemory(peakMemory(results)),
+               baseTime/totalTime if totalTime > 0 else 1.0, ' '.join('%s:%d' % status for status in sorted(statuses.items()))) +
+              bcolorsObject.ENDC)
+    return buildResults
+
+def sendMessage(connection, message):
+    '''Sends a message of the worker protocol, a JSON object preceded by its length as a 4 byte big endian integer'''
+    data = json.dumps(message).encode()
+    connection.sendall(struct.pack('>I', len(data)) + data)
+
+def receiveExactly(connection, size):
+    '''Receives exactly size bytes from connection, raises ConnectionError if it is closed before'''
+    data = bytearray()
+    while len(data) < size:
+        block = connection.recv(min(size - len(data), 1 << 20))
+        if not block:
+            raise ConnectionError('Connection closed')
+        data += block
+    return bytes(data)
+
+def receiveMessage(connection):
+    '''Receives a message sent with sendMessage'''
+    size, = struct.unpack('>I', receiveExactly(connection, 4))
+    return json.loads(receiveExactly(connection, size).decode())
+
+def workerToken():
+    '''Returns the token shared by the workers and the coordinators, it is read from WORKERTOKENVARIABLE'''
+    return os.environ.get(WORKERTOKENVARIABLE, '')
+
+def authenticationResponse(token, challenge):
+    '''Returns the response to the challenge of a worker, the token itself is never sent'''
+    return hmac.new(token.encode(), challenge.encode(), hashlib.sha256).hexdigest()
+
+def parseAddress(address, defaultHost='127.0.0.1'):
+    '''Returns the (host, port) tuple of an address written as HOST:PORT or only PORT'''
+    host, separator, port = address.rpartition(':')
+    return (host or defaultHost, int(port))
+
+# Connection to a worker, it runs one case at a time. The files are sent once, the worker keeps them by their hash
+class WorkerConnection:
+    def __init__(self, address):
+        self.address = address
+        self.connection = socket.create_connection(parseAddress(address))
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        hello = receiveMessage(self.connection)
+        if hello.get('type') != 'hello' or hello.get('version') != VERSION:
+            raise WorkerError('%s is not a worker of version %s' % (address, VERSION))
+        if workerToken() == '':
+            raise WorkerError('the token of the workers is not set in %s' % (WORKERTOKENVARIABLE))
+        sendMessage(self.connection, {'type':'auth', 'response':authenticationResponse(workerToken(), hello['challenge'])})
+        if receiveMessage(self.connection).get('type') != 'ready':
+            raise WorkerError('%s rejected the token in %s' % (address, WORKERTOKENVARIABLE))
+        self.jobs = hello['jobs']
+        self.sentFiles = set()
+
+    def sendFile(self, fileName):
+        '''Sends fileName if the worker does not have it already, returns the [hash, name] the worker knows it by'''
+        fileReference = [cachedHashFile(fileName), os.path.basename(fileName)]
+        if tuple(fileReference) in self.sentFiles:
+            return fileReference
+
+        size = os.path.getsize(fileName)
+        sendMessage(self.connection, {'type':'file', 'file':fileReference, 'size':size})
+        if receiveMessage(self.connection)['need']:
+            with open(fileName, 'rb') as sentFile:
+                self.connection.sendfile(sentFile)
+            if receiveMessage(self.connection)['type'] != 'stored':
+                raise WorkerError('%s could not store %s' % (self.address, fileName))
+        self.sentFiles.add(tuple(fileReference))
+        return fileReference
+
+    def judgeCase(self, executable, case, settings):
+        '''Same as judgeCase, but the case is run by the worker'''
+        caseNumber, fileInAddr, fileOutAddr = case
+        message = {'type':'case', 'caseNumber':caseNumber,
+                   'executable':self.sendFile(executable),
+                   'input':self.sendFile(fileInAddr),
+                   'output':self.sendFile(fileOutAddr) if fileOutAddr != '' else '',
+                   'settings':dict(settings, checker=self.sendFile(settings['checker']) if settings['checker'] != '' else '',
+                                   interactor=self.sendFile(settings['interactor']) if settings['interactor'] != '' else '')}
+        sendMessage(self.connection, message)
+        reply = receiveMessage(self.connection)
+        if reply['type'] != 'result':
+            raise WorkerError('%s failed to run case %s: %s' % (self.address, caseNumber, reply.get('message', '')))
+
+        result = reply['result']
+        if result['mismatch'] is not None:
+            result['mismatch'] = tuple(result['mismatch'])
+        return result
+
+    def close(self):
+        self.connection.close()
+
+# Slots where the cases are run, None is a local slot and the others are connections to the workers
+# The cases of a worker that failed run in the local slots, so there are never more than localJobs local cases
+class WorkerPool:
+    def __init__(self, workers, localJobs=1):
+        self.slots = queue.Queue()
+        self.localSlots = threading.Semaphore(localJobs)
+        self.connections = []
+        for slot in range(localJobs):
+            self.slots.put(None)
+
+        # Each worker gets as many connections as jobs it runs
+        for address in workers:
+            try:
+                connection = WorkerConnection(address)
+                self.connections.append(connection)
+                for slot in range(connection.jobs - 1):
+                    self.connections.append(WorkerConnection(address))
+            except (OSError, ValueError) as e:
+                print(bcolorsObject.WARNING + 'Could not connect to the worker %s: %s' % (address, e) + bcolorsObject.ENDC, file = stderr)
+        for connection in self.connections:
+            self.slots.put(connection)
+        self.slotCount = self.slots.qsize()
+
+    def size(self):
+        return self.slotCount
+
+    def judgeCase(self, executable, case, settings):
+        '''Same as judgeCase, the case is run in the first slot that is free
+        If a worker fails its slot is dropped and the case waits for a local slot'''
+        slot = self.slots.get()
+        if slot is None:
+            try:
+                return self.judgeLocally(executable, case, settings)
+            finally:
+                self.slots.put(slot)
+
+        try:
+            result = slot.judgeCase(executable, case, settings)
+        except (OSError, ValueError) as e:
+            print(bcolorsObject.WARNING + 'Worker %s failed, its cases are run locally: %s' % (slot.address, e) + bcolorsObject.ENDC, file = stderr)
+            slot.close()
+            return self.judgeLocally(executable, case, settings)
+        self.slots.put(slot)
+        return result
+
+    def judgeLocally(self, executable, case, settings):
+        '''Runs a case in one of the local slots, the ones taken from the queue and the ones of failed workers share them'''
+        with self.localSlots:
+            return judgeCase(executable, case, settings)
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+def serveConnection(connection, jobs, token):
+    '''Serves the requests of a coordinator until it closes the connection
+    The coordinator must answer a random challenge with the token before any file or case is accepted
+    The files received are stored in CACHEDIRECTORY/worker/HASH/NAME, so they keep their name and are received only once'''
+    workerDirectory = os.path.join(CACHEDIRECTORY, 'worker')
+    def storedFile(fileReference):
+        fileHash, name = fileReference
+        return os.path.join(workerDirectory, os.path.basename(fileHash), os.path.basename(name))
+
+    with connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        challenge = secrets.token_hex(32)
+        sendMessage(connection, {'type':'hello', 'version':VERSION, 'jobs':jobs, 'challenge':challenge})
+        try:
+            reply = receiveMessage(connection)
+        except (OSError, ValueError):
+            return
+        if reply.get('type') != 'auth' or not hmac.compare_digest(str(reply.get('response', '')),
+                                                                  authenticationResponse(token, challenge)):
+            sendMessage(connection, {'type':'error', 'message':'Authentication failed'})
+            return
+        sendMessage(connection, {'type':'ready'})
+
+        while True:
+            try:
+                message = receiveMessage(connection)
+            except (OSError, ValueError):
+                return
+
+            if message['type'] == 'file':
+                fileName = storedFile(message['file'])
+                if os.path.isfile(fileName):
+                    sendMessage(connection, {'type':'need', 'need':False})
+                    continue
+                sendMessage(connection, {'type':'need', 'need':True})
+
+                # The file is written with a temporary name and checked before it is used
+                os.makedirs(os.path.dirname(fileName), exist_ok=True)
+                temporaryFile = fileName + '.%d.%d' % (os.getpid(), threading.get_ident())
+                with open(temporaryFile, 'wb') as receivedFile:
+                    remaining = message['size']
+                    while remaining > 0:
+                        block = receiveExactly(connection, min(remaining, 1 << 20))
+                        receivedFile.write(block)
+                        remaining -= len(block)
+                if hashFile(temporaryFile) != message['file'][0]:
+                    os.remove(temporaryFile)
+                    sendMessage(connection, {'type':'error', 'message':'Corrupted file %s' % (message['file'][1])})
+                    continue
+                os.chmod(temporaryFile, 0o755)
+                os.replace(temporaryFile, fileName)
+                sendMessage(connection, {'type':'stored'})
+            elif message['type'] == 'case':
+                try:
+                    settings = message['settings']
+                    if settings['checker'] != '':
+                        settings['checker'] = storedFile(settings['checker'])
+                    if settings['interactor'] != '':
+                        settings['interactor'] = storedFile(settings['interactor'])
+                    case = (message['caseNumber'], storedFile(message['input']),
+                            storedFile(message['output']) if message['output'] != '' else '')
+                    result = judgeCase(storedFile(message['executable']), case, settings)
+                    sendMessage(connection, {'type':'result', 'result':result})
+                except (OSError, KeyError, ValueError) as e:
+                    sendMessage(connection, {'type':'error', 'message':str(e)})
+            else:
+                sendMessage(connection, {'type':'error', 'message':'Unknown message %s' % (message['type'])})
+
+def serveWorker(address, jobs=1):
+    '''Runs the cases sent by the coordinators connected to address, HOST:PORT or only PORT to listen in localhost
+    Every connection runs one case at a time, the coordinators open jobs connections
+    The worker runs the programs it receives, so it only accepts the coordinators that know the token in WORKERTOKENVARIABLE'''
+    token = workerToken()
+    if token == '':
+        print(bcolorsObject.FAIL + 'Error: Set the token shared with the coordinators in %s' % (WORKERTOKENVARIABLE) + bcolorsObject.ENDC, file = stderr)
+        return
+    server = socket.create_server(parseAddress(address))
+    print(bcolorsObject.DEBUG + 'Worker listening in %s:%d with %d jobs' % (server.getsockname()[:2] + (jobs,)) + bcolorsObject.ENDC)
+    while True:
+        connection, peer = server.accept()
+        threading.Thread(target=serveConnection, args=(connection, jobs, token), daemon=True).start()
+
+def isCaseFile(fileName):
+    '''Checks if fileName is an input or expected output of a case'''
+    fileName = os.path.basename(fileName)
+    return '.in' in fileName or os.path.splitext(fileName)[1] in POSSIBLEFILEOUTEND
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x2, 0x8, 0x40, 0x80
+IN_CREATE, IN_DELETE, IN_IGNORED, IN_ISDIR = 0x100, 0x200, 0x8000, 0x40000000
+
+def inotifyChanges(directories, isWatched, settleTime=0.2):
+    '''Generator of the sets of watched paths changed in directories, using inotify through ctypes
+    directories is a list of (directory, recursive) tuples, isWatched decides if an absolute path is relevant
+    A set is yielded once no event was received for settleTime seconds, so a file saved in many writes is reported once
+    raises OSError if inotify is not available'''
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    inotifyFd = libc.inotify_init1(os.O_CLOEXEC)
+    if inotifyFd < 0:
+        raise OSError(ctypes.get_errno(), 'inotify is not available')
+
+    eventMask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    watches = {}
+    def addWatch(directory, recursive):
+        watch = libc.inotify_add_watch(inotifyFd, os.fsencode(directory), eventMask)
+        if watch < 0:
+            raise OSError(ctypes.get_errno(), 'Could not watch %s' % (directory))
+        watches[watch] = (directory, recursive)
+        if recursive:
+            for entry in os.scandir(directory):
+                if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+                    addWatch(entry.path, recursive)
+
+    try:
+        for directory, recursive in directories:
+            addWatch(os.path.abspath(directory), recursive)
+
+        yield set()
+        while True:
+            changedPaths = set()
+            while not changedPaths or select.select([inotifyFd], [], [], settleTime)[0]:
+                buffer, offset = os.read(inotifyFd, 1 << 16), 0
+                while offset < len(buffer):
+                    watch, mask, cookie, length = struct.unpack_from('iIII', buffer, offset)
+                    name = os.fsdecode(buffer[offset + 16:offset + 16 + length].rstrip(b'\0'))
+                    offset += 16 + length
+                    if mask & IN_IGNORED:
+                        watches.pop(watch, None)
+                        continue
+                    if watch not in watches:
+                        continue
+
+                    directory, recursive = watches[watch]
+                    path = os.path.join(directory, name)
+                    if mask & IN_ISDIR:
+                        # New directories of a recursive watch are watched too, their files are already there
+                        if recursive and mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith('.'):
+                            try:
+                                addWatch(path, recursive)
+                                changedPaths.update(filePath for filePath in locate('*', path) if isWatched(filePath))
+                            except OSError:
+                                pass
+                    elif isWatched(path):
+                        changedPaths.add(path)
+            yield changedPaths
+    finally:
+        os.close(inotifyFd)
+
+def pollChanges(directories, isWatched, interval=0.5):
+    '''Same as inotifyChanges, but the modification time and size of the watched files is checked every interval seconds'''
+    def snapshot():
+        files = {}
+        for directory, recursive in directories:
+            directory = os.path.abspath(directory)
+            walk = os.walk(directory) if recursive else [(directory, [], os.listdir(directory))]
+            for path, dirs, fileNames in walk:
+                dirs[:] = [name for name in dirs if not name.startswith('.')]
+                for fileName in fileNames:
+                    filePath = os.path.join(path, fileName)
+                    if isWatched(filePath):
+                        try:
+                            fileStat = os.stat(filePath)
+                        except OSError:
+                            continue
+                        files[filePath] = (fileStat.st_mtime_ns, fileStat.st_size)
+        return files
+
+    files = snapshot()
+    yield set()
+    while True:
+        time.sleep(interval)
+        currentFiles = snapshot()
+        changedPaths = set(filePath for filePath in set(files) | set(currentFiles) if files.get(filePath) != currentFiles.get(filePath))
+        files = currentFiles
+        if changedPaths:
+            yield changedPaths
+
+def watchChanges(directories, isWatched):
+    '''Generator of the sets of watched paths changed in directories, with inotify if it is available or by polling
+    The first set is empty and is yielded once the directories are watched'''
+    try:
+        changes = inotifyChanges(directories, isWatched)
+        yield next(changes)
+    except (OSError, AttributeError):
+        print(bcolorsObject.WARNING + 'inotify is not available, polling the files for changes' + bcolorsObject.ENDC, file = stderr)
+        changes = pollChanges(directories, isWatched)
+        yield next(changes)
+    yield from changes
 
 def parseExpressions():
     '''Function that implements the parsing of expressions with python module optparse
@@ -406,13 +2113,19 @@ def parseExpressions():
                       help = 'Starts the gdb debugger')
     parser.add_option('-t', '--test',
                       action = 'store_true', dest = 'test', default = False,
-                      help = 'RUNS times runs the program')
+                      help = 'Benchmarks the program RUNS times, if two SOURCES are given they are compared')
     parser.add_option('-e', '--evaluate',
                       action = 'store_true', dest = 'evaluate', default = False,
                       help = 'Evaluates the code with the test cases found in DIR')
     parser.add_option('-g', '--generate',
                       action = 'store_true', dest = 'generate', default = False,
                       help = 'Generates test cases given an executable')
+    parser.add_option('-s', '--stress',
+                      action = 'store_true', dest = 'stress', default = False,
+                      help = 'Compares a SOURCE with a brute force SOURCE using the cases of a generator SOURCE')
+    parser.add_option('--worker',
+                      action = 'store', type = 'string', dest = 'worker', default = '',
+                      help = 'Runs the cases sent by other compileSystem evaluations in ADDRESS, HOST:PORT or only PORT to listen in localhost. Only the evaluations with the same token in CSWORKERTOKEN are accepted', metavar = 'ADDRESS')
 
     # Miscellaneous utils
     miscellaneousUtils = OptionGroup(parser, 'Miscellaneous utilities')
@@ -425,12 +2138,27 @@ def parseExpressions():
     miscellaneousUtils.add_option('--no-optimize',
                                   action = 'store_false', dest = 'optimize', default = True,
                                   help = 'Sets the -O2 option in the C/C++ compiler. It is true by default')
+    miscellaneousUtils.add_option('--no-compile-cache',
+                                  action = 'store_false', dest = 'compileCache', default = True,
+                                  help = 'Always compiles the SOURCE instead of reusing the executable of an unchanged SOURCE')
+    miscellaneousUtils.add_option('--pch',
+                                  action = 'store_true', dest = 'pch', default = False,
+                                  help = 'Uses a cached precompiled bits/stdc++.h for the SOURCES that include it. If g++ rejects it, it is built again')
     miscellaneousUtils.add_option('--no-compile',
                                   action = 'store_true', dest = 'noCompile', default = False,
                                   help = 'Forces the program to not compile the source file. It is false by default')
     miscellaneousUtils.add_option('--disable-colors',
                                   action = 'store_false', dest = 'terminalColors', default = True,
                                   help = 'Disables the output colors. Is True by default')
+    miscellaneousUtils.add_option('--watch',
+                                  action = 'store_true', dest = 'watch', default = False,
+                                  help = 'Compiles or evaluates the SOURCES again each time they, the checker or the cases change')
+    miscellaneousUtils.add_option('--validator',
+                                  action = 'store', type = 'string', dest = 'validator', default = '',
+                                  help = 'Compiles VALIDATOR and checks every input with it before evaluating or while generating, stops at the first invalid case. It runs under the evaluation limits, an input is invalid if it breaks them. The valid inputs are saved in .csvalid', metavar = 'VALIDATOR')
+    miscellaneousUtils.add_option('--jobs',
+                                  action = 'store', type = 'int', dest = 'jobs', default = 1,
+                                  help = 'Runs up to JOBS cases at the same time. If JOBS is 0 uses all the cores. Is 1 by default', metavar = 'JOBS')
     parser.add_option_group(miscellaneousUtils)
 
     # Testing utils
@@ -438,6 +2166,18 @@ def parseExpressions():
     testingUtils.add_option('--runs',
                             action = 'store', type = 'int', dest = 'testingTimes', default = 10,
                             help = 'Changes the number of RUNS. By default RUNS is 10', metavar = 'RUNS')
+    testingUtils.add_option('--input',
+                            action = 'store', type = 'string', dest = 'benchmarkInput', default = '',
+                            help = 'Uses INPUT as stdin for each of the RUNS', metavar = 'INPUT')
+    testingUtils.add_option('--warmup',
+                            action = 'store', type = 'int', dest = 'warmup', default = 1,
+                            help = 'Runs the program WARMUP times before the RUNS are measured. Is 1 by default', metavar = 'WARMUP')
+    testingUtils.add_option('--iterations',
+                            action = 'store', type = 'int', dest = 'iterations', default = 1000,
+                            help = 'Stops the stress test after ITERATIONS cases. If it is 0 there is no limit. Is 1000 by default', metavar = 'ITERATIONS')
+    testingUtils.add_option('--stress-time',
+                            action = 'store', type = 'float', dest = 'stressTime', default = 60,
+                            help = 'Stops the stress test after SECONDS. If it is 0 there is no limit. Is 60 by default', metavar = 'SECONDS')
     parser.add_option_group(testingUtils)
 
     # Evaluation utils
@@ -450,19 +2190,76 @@ def parseExpressions():
                                help = 'Defines TIME during the program can be evaluated. Is 1 by default', metavar = 'TIME')
     evaluationUtils.add_option('--memory',
                                action = 'store', type = 'int', dest = 'totalMemory', default = 64,
-                               help = 'Defines maximum MEMORY available for the program during evaluation. Is 64MB by default', metavar = 'MEMORY')
+                               help = 'Defines maximum MEMORY available for the program during evaluation. It is limited and measured by a cgroup v2 if this process can create one, for example run with systemd-run --user --scope -p Delegate=yes. If not the program can use up to 4 times MEMORY and it is MLE if its peak memory is over MEMORY. Is 64MB by default', metavar = 'MEMORY')
+    evaluationUtils.add_option('--wall-time',
+                               action = 'store', type = 'float', dest = 'wallTime', default = 0,
+                               help = 'Defines the real TIME a case can take before it is killed, the TIME limit is checked against cpu time. Is TIME * FACTOR by default', metavar = 'TIME')
+    evaluationUtils.add_option('--pin',
+                               action = 'store_true', dest = 'pin', default = False,
+                               help = 'Runs each case pinned to a core of its own, with JOBS cases they use JOBS different cores')
+    evaluationUtils.add_option('--nice',
+                               action = 'store', type = 'int', dest = 'nice', default = 0,
+                               help = 'Adds NICE to the priority of the cases, negative values need privileges. Is 0 by default', metavar = 'NICE')
+    evaluationUtils.add_option('--calibrate',
+                               action = 'store_true', dest = 'calibrate', default = False,
+                               help = 'Scales TIME by the speed of this machine relative to the machine where .csreference was saved, it is measured once with a reference program and saved in the cache')
+    evaluationUtils.add_option('--calibrate-reference',
+                               action = 'store_true', dest = 'calibrateReference', default = False,
+                               help = 'Measures the speed of this machine with the reference program and saves it in .csreference, it must be used in the machine where TIME is defined')
+    evaluationUtils.add_option('--profile',
+                               action = 'store_true', dest = 'profile', default = False,
+                               help = 'Runs each case again with perf to count its cycles, instructions and cache misses and find its hot functions, then prints the slowest cases. The time and verdict come from the run without perf')
+    evaluationUtils.add_option('--grace-factor',
+                               action = 'store', type = 'float', dest = 'graceFactor', default = 2,
+                               help = 'Defines the FACTOR that multiplies TIME to obtain the default wall time. Is 2 by default', metavar = 'FACTOR')
     evaluationUtils.add_option('--no-verbose',
                                action = 'store_false', dest = 'verbose', default = True,
                                help = 'Disables detailed output for evaluation. If not enables only prints total')
+    evaluationUtils.add_option('--output-limit',
+                               action = 'store', type = 'float', dest = 'outputLimit', default = 0,
+                               help = 'Defines the maximum SIZE in MB of the output of each case, bigger outputs are OLE. If it is 0 there is no limit. Is 0 by default', metavar = 'SIZE')
     evaluationUtils.add_option('--no-output-files',
                                action = 'store_true', dest = 'noOuts', default = False,
                                help = 'Makes evaluator check only for TLE and MLE')
     evaluationUtils.add_option('--multiple-solutions',
                                action = 'store_true', dest = 'multipleSolutions', default = False,
                                help = 'Changes evaluation to consider mutliple solutions')
+    evaluationUtils.add_option('--float-tolerance',
+                               action = 'store', type = 'float', dest = 'floatTolerance', default = 0,
+                               help = 'Accepts numbers in the output with an absolute or relative ERROR. Is 0 by default', metavar = 'ERROR')
+    evaluationUtils.add_option('--checker',
+                               action = 'store', type = 'string', dest = 'checker', default = '',
+                               help = 'Compiles CHECKER and uses it to score each case. It receives the input, the expected output and the program output', metavar = 'CHECKER')
+    evaluationUtils.add_option('--interactor',
+                               action = 'store', type = 'string', dest = 'interactor', default = '',
+                               help = 'Compiles INTERACTOR and evaluates an interactive problem, its stdout is the stdin of the program and its stdin the stdout of the program. It receives the input, the expected output and the file where it writes the score', metavar = 'INTERACTOR')
+    evaluationUtils.add_option('--no-cache',
+                               action = 'store_false', dest = 'resultsCache', default = True,
+                               help = 'Evaluates every case instead of reusing the results saved in .csresults')
+    evaluationUtils.add_option('--retime',
+                               action = 'store_true', dest = 'retime', default = False,
+                               help = 'Evaluates every case again and updates the results saved in .csresults')
     evaluationUtils.add_option('--alternate-values',
                                action = 'store', type = 'string', dest = 'alternateValues', default = '',
                                help = 'Allows to load an alternate points table', metavar = 'POINTS TABLE')
+    evaluationUtils.add_option('--groups',
+                               action = 'store', type = 'string', dest = 'groups', default = '',
+                               help = 'Scores the cases by subtasks, each line of GROUPS has the points of the group followed by its case numbers', metavar = 'GROUPS')
+    evaluationUtils.add_option('--run-all-cases',
+                               action = 'store_true', dest = 'runAllCases', default = False,
+                               help = 'Evaluates the remaining cases of a group after one of them failed')
+    evaluationUtils.add_option('--batch',
+                               action = 'store_true', dest = 'batch', default = False,
+                               help = 'Evaluates all the SOURCES together with the same cases and prints a scoreboard')
+    evaluationUtils.add_option('--flags',
+                               action = 'store', type = 'string', dest = 'flags', default = '',
+                               help = 'Compiles the SOURCES with each COMPILER:FLAGS of the semicolon separated MATRIX, evaluates every build with the cases and prints a table comparing their times. The cases are always timed again', metavar = 'MATRIX')
+    evaluationUtils.add_option('--workers',
+                               action = 'store', type = 'string', dest = 'workers', default = '',
+                               help = 'Runs the cases in the workers of the comma separated ADDRESSES too, the slowest cases are sent first. The token of the workers is read from CSWORKERTOKEN', metavar = 'ADDRESSES')
+    evaluationUtils.add_option('--report',
+                               action = 'store', type = 'string', nargs = 2, dest = 'report', default = None,
+                               help = 'Writes a report of each case to FILE, FORMAT is json or junit. The json cases are written in the order of the cases, each one when it and the cases before it finished, so with --jobs a slow case holds back the next ones. The junit cases are written when their source finishes', metavar = 'FORMAT FILE')
     evaluationUtils.add_option('--new-ioi-mode',
                                action = 'store_true', dest = 'ioiMode', default = False,
                                help = 'Enables new IOI rules mode for evaluation of cases and unlimited stack size')
@@ -479,6 +2276,12 @@ def parseExpressions():
     generationUtilities.add_option('--format',
                                    action = 'store', type = 'string', dest = 'format', default = 'case.',
                                    help = 'Overrides the case name by default the format is \'case.\'. This generates case \'case.1.in\'')
+    generationUtilities.add_option('--seed',
+                                   action = 'store', type = 'int', dest = 'seed', default = 0,
+                                   help = 'Passes SEED to the generator after the case number. Is 0 by default', metavar = 'SEED')
+    generationUtilities.add_option('--pipe',
+                                   action = 'store_true', dest = 'pipe', default = False,
+                                   help = 'Sends the generated case to the SOURCE while the .in file is written')
     parser.add_option_group(generationUtilities)
 
     #optcomplete.autocomplete(parser)
@@ -500,25 +2303,493 @@ def interactCommandLine():
         except ParamError:
             print('Invalid parameter, please see the help screen')
 
-def generateCases(executable, codeGenerator, format, start, end):
-    '''Function that generates a series of cases given an executable and a case generator'''
-    for index in range(start, end + 1):
-        fileNameIn = format + str(index) + '.in';
-        fileNameOut = format + str(index) + '.out';
+def generateCase(executable, codeGenerator, format, index, seed=0, pipe=False):
+    '''Generates the case index, the generator is called with the index and the seed as arguments
+    If pipe is set the output of the generator is written to the .in file and to the executable at the same time
+    returns the tuple (generator return code, executable return code)'''
+    fileNameIn = format + str(index) + '.in';
+    fileNameOut = format + str(index) + '.out';
+    generatorCommand = [codeGenerator, str(index), str(seed)]
+
+    if not pipe:
         with open(fileNameIn, 'w') as fileIn:
-            generatorSubprocess = subprocess.Popen(codeGenerator, stdout=fileIn)
+            generatorSubprocess = subprocess.Popen(generatorCommand, stdout=fileIn)
             generatorSubprocess.wait()
 
         with open(fileNameIn, 'r') as fileIn, open(fileNameOut, 'w') as fileOut:
             executableSubprocess = subprocess.Popen(executable, stdin=fileIn, stdout=fileOut)
             executableSubprocess.wait()
 
+        return generatorSubprocess.returncode, executableSubprocess.returncode
+
+    with open(fileNameIn, 'wb') as fileIn, open(fileNameOut, 'w') as fileOut:
+        generatorSubprocess = subprocess.Popen(generatorCommand, stdout=subprocess.PIPE)
+        executableSubprocess = subprocess.Popen(executable, stdin=subprocess.PIPE, stdout=fileOut)
+        executableReading = True
+        for block in iter(lambda: generatorSubprocess.stdout.read1(1 << 16), b''):
+            fileIn.write(block)
+            # The executable may finish without reading all the input, the file must still be complete
+            if executableReading:
+                try:
+                    executableSubprocess.stdin.write(block)
+                except BrokenPipeError:
+                    executableReading = False
+        try:
+            executableSubprocess.stdin.close()
+        except BrokenPipeError:
+            pass
+        generatorSubprocess.wait()
+        executableSubprocess.wait()
+
+    return generatorSubprocess.returncode, executableSubprocess.returncode
+
+def generateCases(executable, codeGenerator, format, start, end, jobs=1, seed=0, pipe=False, validator='', settings=None, useCache=True):
+    '''Function that generates a series of cases given an executable and a case generator
+    jobs is the number of cases generated at the same time, they are reported in order
+    seed is passed to the generator after the case index, so the cases can be generated again
+    pipe sends the output of the generator directly to the executable while the .in file is written
+    validator checks each generated input in the same job under the limits in settings, the generation stops at the first invalid case
+    useCache skips the inputs that already passed the same validator
+    returns True if every case was generated and is valid'''
+    validations = loadValidations() if validator != '' and useCache else None
+    validatorHash = validatorHashKey(validator, settings) if validations is not None else ''
+    def generateIndex(index):
+        returnCodes = generateCase(executable, codeGenerator, format, index, seed, pipe)
+        if validator == '' or returnCodes[0] != 0:
+            return returnCodes + (None,)
+        return returnCodes + (validateInput(validator, format + str(index) + '.in', settings, validatorHash, validations),)
+
+    indexes = range(start, end + 1)
+    if jobs == 1:
+        results = map(generateIndex, indexes)
+    else:
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        results = executor.map(generateIndex, indexes)
+
+    generated = True
+    for index, (generatorReturnCode, executableReturnCode, validationError) in zip(indexes, results):
+        fileNameIn = format + str(index) + '.in';
+        fileNameOut = format + str(index) + '.out';
+        if generatorReturnCode != 0 or executableReturnCode != 0:
+            print(bcolorsObject.FAIL + 'Error generating %s/%s, the generator returned %d and the executable %d' %
+                  (fileNameIn, fileNameOut, generatorReturnCode, executableReturnCode) + bcolorsObject.ENDC, file = stderr)
+            generated = False
+            continue
+        if validationError is not None:
+            print(bcolorsObject.FAIL + 'Invalid case %s: %s' % (fileNameIn, validationError) + bcolorsObject.ENDC, file = stderr)
+            generated = False
+            break
         print("Generated cases " + fileNameIn + "/" + fileNameOut)
 
+    # The cases that were not started yet are not generated after an invalid case
+    if jobs != 1:
+        executor.shutdown(cancel_futures=True)
+    if validations is not None:
+        saveValidations(validations)
+    return generated
+
+def stressTest(solution, bruteForce, generator, settings, jobs=1, iterations=1000, timeBudget=60, seed=0):
+    '''Runs the solution and the brute force with random cases from the generator until their outputs differ
+    The generator is called with the iteration number and seed + iteration number as arguments
+    The test stops at the first failure, or when the iterations or the timeBudget in seconds are used,
+    if either of them is 0 it is not limited. settings has the limits for the solution and the brute force,
+    the generator is only killed if it is still running when the timeBudget is used
+    The smallest failing input found is saved in stress.in, the brute force output in stress.ans
+    and the solution output in stress.out
+    returns True if no failure was found'''
+    lock, stopEvent = threading.Lock(), threading.Event()
+    state = {'next':0, 'done':0}
+    failures = []
+    unfinished = []
+    timeStart = time.time()
+
+    def runIteration(iteration, workDirectory):
+        '''Runs one iteration, returns None if the outputs are equal, False if the generator was killed
+        at the end of the timeBudget or a description of the failure'''
+        fileNameIn, fileNameAns, fileNameOut = [os.path.join(workDirectory, 'stress' + ending) for ending in ['.in', '.ans', '.out']]
+        # The outputs of the previous iteration must not be saved with a failure of the generator
+        for fileName in [fileNameAns, fileNameOut]:
+            if os.path.exists(fileName):
+                os.remove(fileName)
+        remainingTime = max(timeBudget - (time.time() - timeStart), 1) if timeBudget else 0
+        generatorSettings = dict(settings, time=0, wallTime=remainingTime, memory=0, outputLimit=0, pin=False, profile=False)
+        with open(os.devnull, 'r') as fileNull, open(fileNameIn, 'w') as fileIn:
+            usage = runProcess([generator, str(iteration), str(seed + iteration)], fileNull, fileIn, generatorSettings)
+        if usage['timedOut']:
+            return False
+        if usage['returnCode'] != 0:
+            return 'the generator failed with return code %d' % (usage['returnCode'])
+        with open(fileNameIn, 'r') as fileIn, open(fileNameAns, 'w') as fileAns:
+            usage = runProcess(bruteForce, fileIn, fileAns, settings)
+        if usage['timedOut'] or usage['returnCode'] != 0:
+            return 'the brute force failed with return code %d' % (usage['returnCode'])
+        with open(fileNameIn, 'r') as fileIn, open(fileNameOut, 'w') as fileOut:
+            usage = runProcess(solution, fileIn, fileOut, settings)
+        if usage['timedOut'] or usage['returnCode'] == -signal.SIGXCPU or usage['cpuTime'] > settings['time']:
+            return 'TLE'
+        if usage['returnCode'] == -signal.SIGXFSZ:
+            return 'OLE'
+        if usage['returnCode'] != 0:
+            return 'RTE with return code %d' % (usage['returnCode'])
+        mismatch = compareOutputs(fileNameOut, fileNameAns, settings['floatTolerance'])
+        if mismatch is not None:
+            return 'WA at line %d token %d' % mismatch
+        return None
+
+    def worker():
+        workDirectory = tempfile.mkdtemp(prefix='csstress.', dir=scratchDirectory(settings))
+        try:
+            while not stopEvent.is_set():
+                with lock:
+                    iteration = state['next']
+                    if (iterations and iteration >= iterations) or (timeBudget and time.time() - timeStart > timeBudget):
+                        break
+                    state['next'] += 1
+
+                failure = runIteration(iteration, workDirectory)
+                if failure is False:
+                    with lock:
+                        unfinished.append(iteration)
+                    break
+                with lock:
+                    state['done'] += 1
+                    if failure is not None:
+                        # Keep the files of the failure, the directory is replaced for the next iterations
+                        failures.append((os.path.getsize(os.path.join(workDirectory, 'stress.in')), iteration, failure, workDirectory))
+                        workDirectory = tempfile.mkdtemp(prefix='csstress.', dir=scratchDirectory(settings))
+                        stopEvent.set()
+        finally:
+            shutil.rmtree(workDirectory, ignore_errors=True)
+
+    workers = [threading.Thread(target=worker) for i in range(jobs)]
+    for workerThread in workers:
+        workerThread.start()
+    for workerThread in workers:
+        workerThread.join()
+
+    timeUsed = time.time() - timeStart
+    print(bcolorsObject.OKBLUE + 'STRESS TEST: %d iterations in %.2f seconds (%.1f iterations/s)' %
+          (state['done'], timeUsed, state['done']/timeUsed if timeUsed > 0 else 0) + bcolorsObject.ENDC)
+    for iteration in sorted(unfinished):
+        print(bcolorsObject.WARNING + 'The generator of iteration %d did not finish before the time budget was used' %
+              (iteration) + bcolorsObject.ENDC, file = stderr)
+
+    if failures == []:
+        print(bcolorsObject.OKGREEN + 'No differences found' + bcolorsObject.ENDC)
+        return True
+
+    size, iteration, failure, workDirectory = min(failures)
+    for ending in ['.in', '.ans', '.out']:
+        if os.path.exists(os.path.join(workDirectory, 'stress' + ending)):
+            shutil.copy(os.path.join(workDirectory, 'stress' + ending), 'stress' + ending)
+    for failureFiles in failures:
+        shutil.rmtree(failureFiles[3], ignore_errors=True)
+    print(bcolorsObject.FAIL + 'ITERATION %d (SEED %d): %s' % (iteration, seed + iteration, failure) + bcolorsObject.ENDC)
+    print(bcolorsObject.FAIL + 'Smallest failing input (%d bytes) saved in stress.in' % (size) + bcolorsObject.ENDC)
+    return False
+
+def summarizeSamples(samples):
+    '''Returns the min, median, 95th percentile, mean and standard deviation of a list of samples'''
+    orderedSamples = sorted(samples)
+    return {'min':orderedSamples[0],
+            'median':statistics.median(orderedSamples),
+            'p95':orderedSamples[max(int(math.ceil(0.95*len(orderedSamples))) - 1, 0)],
+            'mean':statistics.mean(orderedSamples),
+            'stddev':statistics.stdev(orderedSamples) if len(orderedSamples) > 1 else 0.0}
+
+def incompleteBeta(x, a, b, iterations=200, epsilon=1e-12):
+    '''Regularized incomplete beta function I_x(a, b), evaluated with its continued fraction'''
+    if x <= 0 or x >= 1:
+        return max(min(x, 1.0), 0.0)
+    # The continued fraction converges quickly for x < (a + 1)/(a + b + 2), if not the symmetry is used
+    if x > (a + 1)/(a + b + 2):
+        return 1 - incompleteBeta(1 - x, b, a, iterations, epsilon)
+
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a*math.log(x) + b*math.log(1 - x))/a
+    # Lentz's algorithm
+    tiny = 1e-300
+    c, d = 1.0, 1 - (a + b)*x/(a + 1)
+    d = 1/(d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, iterations + 1):
+        for numerator in [m*(b - m)*x/((a + 2*m - 1)*(a + 2*m)), -(a + m)*(a + b + m)*x/((a + 2*m)*(a + 2*m + 1))]:
+            d = 1 + numerator*d
+            d = 1/(d if abs(d) > tiny else tiny)
+            c = 1 + numerator/c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c*d
+        if abs(c*d - 1) < epsilon:
+            break
+    return front*fraction
+
+def welchTest(samplesA, samplesB):
+    '''Welch's t test for the difference of the means of two lists of samples, each one needs at least 2 samples
+    returns the tuple (t, p), p is two sided and uses Student's t distribution with the Welch-Satterthwaite degrees of freedom'''
+    summaryA, summaryB = summarizeSamples(samplesA), summarizeSamples(samplesB)
+    varianceA, varianceB = summaryA['stddev']**2/len(samplesA), summaryB['stddev']**2/len(samplesB)
+    standardError = math.sqrt(varianceA + varianceB)
+    if standardError == 0:
+        return (0.0, 1.0) if summaryA['mean'] == summaryB['mean'] else (math.inf, 0.0)
+    t = (summaryA['mean'] - summaryB['mean'])/standardError
+    degrees = (varianceA + varianceB)**2/(varianceA**2/(len(samplesA) - 1) + varianceB**2/(len(samplesB) - 1))
+    return t, incompleteBeta(degrees/(degrees + t*t), degrees/2, 0.5)
+
+def benchmarkSettings(options):
+    '''Returns the settings of the benchmarks, the programs are measured without the time, memory and output limits
+    of the evaluation, so a slow program is not cut at the time limit'''
+    return dict(limitSettings(options), time=0, wallTime=0, memory=0, outputLimit=0)
+
+def benchmark(executables, inputFile, settings, runs=10, warmup=1):
+    '''Runs each executable runs times with inputFile as stdin after warmup runs that are not measured
+    The runs of the executables are interleaved, so all of them are affected equally by the noise of the machine
+    The runs that failed or were killed are reported and left out of the samples
+    returns a list with the runProcess results of each executable'''
+    samples = [[] for executable in executables]
+    for run in range(warmup + runs):
+        for executable, executableSamples in zip(executables, samples):
+            with open(inputFile or os.devnull, 'r') as fileIn, open(os.devnull, 'w') as fileOut:
+                usage = runProcess(executable, fileIn, fileOut, settings)
+            if usage['timedOut'] or usage['returnCode'] != 0:
+                print(bcolorsObject.WARNING + 'Run %d of %s returned %d, it is not measured' % (run + 1, executable, usage['returnCode']) +
+                      bcolorsObject.ENDC, file = stderr)
+            elif run >= warmup:
+                executableSamples.append(usage)
+    return samples
+
+def printBenchmark(executable, samples):
+    '''Prints the cpu time and wall time statistics and the peak memory of the samples of an executable'''
+    print(bcolorsObject.HEADER + 'BENCHMARK %s: %d runs' % (executable, len(samples)) + bcolorsObject.ENDC)
+    if samples == []:
+        print(bcolorsObject.FAIL + 'Every run of %s failed' % (executable) + bcolorsObject.ENDC)
+        return
+    for name, key in [('CPU TIME', 'cpuTime'), ('WALL TIME', 'wallTime')]:
+        summary = summarizeSamples([sample[key] for sample in samples])
+        print(bcolorsObject.OKBLUE + '%s\tMIN: %.4f\tMEDIAN: %.4f\tP95: %.4f\tSTDDEV: %.4f' %
+              (name, summary['min'], summary['median'], summary['p95'], summary['stddev']) + bcolorsObject.ENDC)
+    print(bcolorsObject.OKBLUE + 'PEAK MEMORY: %s' % (formatMemory(peakMemory(samples))) + bcolorsObject.ENDC)
+
+def compareBenchmarks(executableA, samplesA, executableB, samplesB):
+    '''Prints the A/B comparison of the cpu time of two executables and if the difference is significant'''
+    if len(samplesA) < 2 or len(samplesB) < 2:
+        print(bcolorsObject.WARNING + 'A/B: Each program needs at least 2 successful runs to be compared' + bcolorsObject.ENDC)
+        return
+    cpuTimesA, cpuTimesB = [sample['cpuTime'] for sample in samplesA], [sample['cpuTime'] for sample in samplesB]
+    medianA, medianB = statistics.median(cpuTimesA), statistics.median(cpuTimesB)
+    t, p = welchTest(cpuTimesA, cpuTimesB)
+    faster, slower = (executableA, executableB) if medianA <= medianB else (executableB, executableA)
+    ratio = max(medianA, medianB)/min(medianA, medianB) if min(medianA, medianB) > 0 else math.inf
+    colorOut = bcolorsObject.OKGREEN if p < 0.05 else bcolorsObject.WARNING
+    print(colorOut + 'A/B: %s is %.2fx faster than %s (median cpu time), t = %.2f, p = %.4f: %s' %
+          (faster, ratio, slower, t, p, 'SIGNIFICANT' if p < 0.05 else 'NOT SIGNIFICANT') + bcolorsObject.ENDC)
+
+# Workload used to compare the speed of the machines, it does the usual work of a solution:
+# integer arithmetic, random memory accesses and sorting
+REFERENCESOURCE = r'''#include <algorithm>
+#include <cstdio>
+#include <vector>
+
+int main() {
+    const int size = 1 << 22;
+    std::vector<unsigned> values(size);
+    unsigned state = 12345;
+    for (int i = 0; i < size; i++) {
+        state = state * 1103515245u + 12345u;
+        values[i] = state;
+    }
+
+    unsigned long long sum = 0;
+    for (int round = 0; round < 8; round++)
+        for (int i = 0; i < size; i++)
+            sum += values[values[i] & (size - 1)] >> round;
+
+    std::sort(values.begin(), values.end());
+    for (int i = 0; i < size; i += 4096)
+        sum ^= values[i];
+    printf("%llu\n", sum);
+    return 0;
+}
+'''
+
+def measureReferenceTime(runs=5):
+    '''Runs the reference workload pinned to a core and returns its median cpu time, or None if it could not be run'''
+    referenceDirectory = os.path.join(CACHEDIRECTORY, 'calibration')
+    os.makedirs(referenceDirectory, exist_ok=True)
+    referenceSource = os.path.join(referenceDirectory, 'reference.cpp')
+    with open(referenceSource, 'w') as sourceFile:
+        sourceFile.write(REFERENCESOURCE)
+
+    executable = compileSources([referenceSource], False)[referenceSource]
+    if executable == '':
+        return None
+
+    settings = dict(DEFAULTSETTINGS, time=10, wallTime=30, memory=256, noOuts=True, outputLimit=1,
+                    pin=hasattr(os, 'sched_setaffinity'))
+    times = []
+    # The first run is a warm-up
+    for run in range(runs + 1):
+        with open(os.devnull, 'r') as fileIn, open(os.devnull, 'w') as fileOut:
+            usage = runProcess(executable, fileIn, fileOut, settings)
+        if usage['returnCode'] != 0 or usage['timedOut']:
+            return None
+        times.append(usage['cpuTime'])
+    return statistics.median(times[1:])
+
+def hostReferenceTime(measureAgain=False):
+    '''Returns the time of the reference workload in this machine, it is measured once and saved in CALIBRATIONFILE
+    for each host name, so machines that share the cache directory keep their own time. measureAgain ignores the saved time
+    Returns None if it could not be measured'''
+    hostName = os.uname().nodename
+    hostTimes = loadJsonFile(CALIBRATIONFILE, {})
+    if hostName in hostTimes and not measureAgain:
+        return hostTimes[hostName]
+
+    print(bcolorsObject.DEBUG + 'Measuring the speed of %s' % (hostName) + bcolorsObject.ENDC)
+    referenceTime = measureReferenceTime()
+    if referenceTime is None:
+        return None
+
+    hostTimes[hostName] = referenceTime
+    saveJsonFile(CALIBRATIONFILE, hostTimes, 'the speed of this machine')
+    return referenceTime
+
+def saveReferenceTime():
+    '''Measures the reference workload in this machine and saves its time in REFERENCEFILE, it must be run in the machine
+    where the time limits are defined. Returns the time, or None if it could not be measured or saved'''
+    referenceTime = hostReferenceTime(True)
+    if referenceTime is None:
+        print(bcolorsObject.FAIL + 'Error: Could not measure the speed of this machine' + bcolorsObject.ENDC, file = stderr)
+        return None
+    try:
+        with open(REFERENCEFILE, 'w') as referenceFile:
+            json.dump({'host':os.uname().nodename, 'time':referenceTime}, referenceFile)
+    except IOError:
+        print(bcolorsObject.FAIL + 'Error: Could not save %s' % (REFERENCEFILE) + bcolorsObject.ENDC, file = stderr)
+        return None
+    return referenceTime
+
+def speedFactor():
+    '''Returns the time of the reference workload in this machine divided by its time in the machine where the limits
+    were defined, saved in REFERENCEFILE. A factor bigger than 1 means that this machine is slower
+    Returns None if there is no reference or the speed could not be measured'''
+    try:
+        with open(REFERENCEFILE, 'r') as referenceFile:
+            reference = json.load(referenceFile)
+        referenceTime = float(reference['time'])
+    except (IOError, ValueError, KeyError, TypeError):
+        print(bcolorsObject.FAIL + 'Error: There is no valid %s, run --calibrate-reference in the machine where the limits are defined' %
+              (REFERENCEFILE) + bcolorsObject.ENDC, file = stderr)
+        return None
+
+    hostTime = hostReferenceTime()
+    if hostTime is None or referenceTime <= 0:
+        print(bcolorsObject.FAIL + 'Error: Could not measure the speed of this machine' + bcolorsObject.ENDC, file = stderr)
+        return None
+    return hostTime / referenceTime
+
+def limitSettings(options, checker='', interactor=''):
+    '''Returns the dictionary with the limits and the evaluation mode used by runProcess and judgeCase from the parsed options'''
+    return dict(DEFAULTSETTINGS,
+                time=options.evaluationTime,
+                wallTime=options.wallTime if options.wallTime > 0 else options.graceFactor*options.evaluationTime,
+                memory=options.totalMemory,
+                ioiMode=options.ioiMode,
+                noOuts=options.noOuts,
+                multipleSolutions=options.multipleSolutions,
+                floatTolerance=options.floatTolerance,
+                checker=checker,
+                outputLimit=options.outputLimit,
+                pin=options.pin,
+                nice=options.nice,
+                profile=options.profile,
+                interactor=interactor)
+
+def watch(options, sources):
+    '''Compiles or evaluates the sources, then does it again each time they, the checker or the cases change
+    The executables, the suite and the results cache are kept between iterations, so only the sources that
+    changed are compiled and only the cases that changed or whose executable changed are evaluated again'''
+    if not (options.compile or options.evaluate) or options.noCompile:
+        print(bcolorsObject.FAIL + 'Error: --watch can only be used to compile or evaluate' + bcolorsObject.ENDC, file = stderr)
+        return
+    if options.report is not None:
+        print(bcolorsObject.WARNING + 'The report is not written in watch mode' + bcolorsObject.ENDC, file = stderr)
+
+    checkerSources = [options.checker] if options.evaluate and options.checker != '' else []
+    validatorSources = [options.validator] if options.evaluate and options.validator != '' else []
+    interactorSources = [options.interactor] if options.evaluate and options.interactor != '' else []
+    helperSources = checkerSources + validatorSources + interactorSources
+    watchedSources = dict((os.path.abspath(sourceFile), sourceFile) for sourceFile in sources + helperSources)
+    dataFiles = set(os.path.abspath(dataFile) for dataFile in [options.groups, options.alternateValues] if dataFile != '')
+    caseDirectory = os.path.join(os.path.abspath(options.workingDirectory), '')
+
+    def isWatched(path):
+        if path in watchedSources or path in dataFiles:
+            return True
+        return options.evaluate and path.startswith(caseDirectory) and isCaseFile(path)
+
+    directories = set((os.path.dirname(path), False) for path in list(watchedSources) + list(dataFiles))
+    if options.evaluate:
+        directories.add((caseDirectory, True))
+    changes = watchChanges(sorted(directories), isWatched)
+    next(changes)
+
+    executables = dict((sourceFile, '') for sourceFile in sources + helperSources)
+    suite, caseFiles = None, set()
+    resultsCache = loadResultsCache() if options.resultsCache else None
+    changedPaths, retime, valid = set(watchedSources), options.retime, True
+    while True:
+        # Only the sources that changed are compiled again
+        changedSources = [watchedSources[path] for path in sorted(changedPaths) if path in watchedSources]
+        if changedSources:
+            executables.update(compileSources(changedSources, options.verbose, options.optimize, options.compileCache, options.jobs, options.pch))
+
+        if options.evaluate:
+            # The cases are scanned again only if a case was added or removed, or the values or groups changed
+            changedCases = [path for path in changedPaths if path not in watchedSources]
+            if suite is None or any(path in dataFiles or path not in caseFiles or not os.path.isfile(path) for path in changedCases):
+                with open('.cslog', 'a') as cslog:
+                    suite = loadSuite(options.workingDirectory, options.noOuts, options.alternateValues, options.groups, cslog)
+                caseFiles = set(path for case in (suite['cases'] if suite is not None else []) for path in case[1:] if path != '')
+
+            # The inputs that already passed the validator are not validated again
+            if validatorSources and (changedCases or set(validatorSources) & set(changedSources)):
+                valid = (suite is not None and executables[options.validator] != '' and
+                         validateCases(os.path.abspath(executables[options.validator]), [case[1] for case in suite['cases']],
+                                       limitSettings(options), options.jobs, options.resultsCache))
+
+            # Every source is evaluated again if the cases, the checker or the interactor changed, if not only the ones that changed
+            checkerExecutable = os.path.abspath(executables[options.checker]) if checkerSources and executables[options.checker] != '' else ''
+            interactorExecutable = os.path.abspath(executables[options.interactor]) if interactorSources and executables[options.interactor] != '' else ''
+            if changedCases or set(helperSources) & set(changedSources):
+                changedSources = sources
+            evaluateSources = [sourceFile for sourceFile in sources if sourceFile in changedSources and executables[sourceFile] != '']
+            if not valid or (checkerSources and checkerExecutable == '') or (interactorSources and interactorExecutable == ''):
+                evaluateSources = []
+            if suite is not None and evaluateSources:
+                if options.batch:
+                    evaluateBatch([(sourceFile, os.path.abspath(executables[sourceFile])) for sourceFile in evaluateSources],
+                                  options.workingDirectory, limitSettings(options, checkerExecutable, interactorExecutable),
+                                  options.jobs, options.alternateValues,
+                                  options.groups, options.resultsCache, retime, options.runAllCases, None, suite, resultsCache)
+                else:
+                    for sourceFile in evaluateSources:
+                        evaluate(sourceFile, options.workingDirectory, limitSettings(options, checkerExecutable, interactorExecutable),
+                                 verbose = options.verbose, alternateValues = options.alternateValues, jobs = options.jobs,
+                                 useCache = options.resultsCache, retime = retime, groupsFile = options.groups,
+                                 runAllCases = options.runAllCases, suite = suite, resultsCache = resultsCache)
+            retime = False
+
+        print(bcolorsObject.DEBUG + 'Watching for changes, press Ctrl-C to stop' + bcolorsObject.ENDC)
+        changedPaths = next(changes)
+        print(bcolorsObject.HEADER + 'Changed: %s' % (', '.join(sorted(map(os.path.relpath, changedPaths)))) + bcolorsObject.ENDC)
+
 def checkEvalType(options, *args):
     '''Function that receives the options from the prompt and a list of executables and executes the correct function'''
 
     (args,) = args
+    if options.worker != '':
+        serveWorker(options.worker, options.jobs)
+        return
+
     if options.generate:
         if len(args) != 2:
             print(bcolorsObject.FAIL + 'More than one core option was used\nKilling process' + bcolorsObject.ENDC, file = stderr)
@@ -533,10 +2804,13 @@ def checkEvalType(options, *args):
             print(bcolorsObject.FAIL + 'Error: File %s does not exist' % (str(sourceFile)) + bcolorsObject.ENDC, file = stderr)
             return
 
-        sourceExecutable = compileSource(sourceFile, options.verbose, options.optimize)
-        generatorExecutable = compileSource(caseGenerator, options.verbose, options.optimize)
+        validatorSources = [options.validator] if options.validator != '' else []
+        executables = compileSources([sourceFile, caseGenerator] + validatorSources, options.verbose, options.optimize,
+                                     options.compileCache, options.jobs, options.pch)
+        sourceExecutable, generatorExecutable = executables[sourceFile], executables[caseGenerator]
+        validatorExecutable = os.path.abspath(executables[options.validator]) if validatorSources else ''
 
-        if sourceExecutable == '' or generatorExecutable == '':
+        if sourceExecutable == '' or generatorExecutable == '' or validatorSources and executables[options.validator] == '':
             return
 
         if not routeSpecified(sourceExecutable):
@@ -545,10 +2819,96 @@ def checkEvalType(options, *args):
         if not routeSpecified(generatorExecutable):
             generatorExecutable = './' + generatorExecutable
 
-        generateCases(sourceExecutable, generatorExecutable, options.format, options.start, options.end)
+        generateCases(sourceExecutable, generatorExecutable, options.format, options.start, options.end,
+                      options.jobs, options.seed, options.pipe, validatorExecutable, limitSettings(options), options.resultsCache)
+        return
+
+    if options.stress:
+        if len(args) != 3:
+            print(bcolorsObject.FAIL + 'Stress testing needs a SOURCE, a brute force SOURCE and a generator SOURCE' + bcolorsObject.ENDC, file = stderr)
+            raise MoreOptionsError
+
+        executables = compileSources(args, options.verbose, options.optimize, options.compileCache, options.jobs, options.pch)
+        executables = [executables[sourceFile] for sourceFile in args]
+        if '' in executables:
+            return
+
+        solution, bruteForce, generator = [os.path.abspath(executable) for executable in executables]
+        stressTest(solution, bruteForce, generator, limitSettings(options), options.jobs, options.iterations, options.stressTime, options.seed)
+        return
+
+    if options.watch:
+        watch(options, args)
+        return
+
+    # All the sources are compiled together, the checker, the validator and the interactor are compiled only once for all of them
+    checkerSources = [options.checker] if options.evaluate and options.checker != '' else []
+    validatorSources = [options.validator] if options.evaluate and options.validator != '' else []
+    interactorSources = [options.interactor] if options.evaluate and options.interactor != '' else []
+    helperSources = checkerSources + validatorSources + interactorSources
+    # With a flag matrix the sources are compiled later, once for each flag set
+    flagMatrix = options.evaluate and options.flags != ''
+    compiledSources = helperSources if flagMatrix else args + helperSources
+    if options.compile or not options.noCompile:
+        executables = compileSources(compiledSources, options.verbose, options.optimize,
+                                     options.compileCache, options.jobs, options.pch)
+    else:
+        executables = dict((sourceFile, os.path.splitext(sourceFile)[0]) for sourceFile in compiledSources)
+
+    checkerExecutable = ''
+    if checkerSources:
+        checkerExecutable = executables[options.checker]
+        if checkerExecutable == '':
+            return
+        checkerExecutable = os.path.abspath(checkerExecutable)
+
+    interactorExecutable = ''
+    if interactorSources:
+        interactorExecutable = executables[options.interactor]
+        if interactorExecutable == '':
+            return
+        interactorExecutable = os.path.abspath(interactorExecutable)
+
+    # The cases are validated before any source is evaluated, nothing is evaluated if one of them is invalid
+    if validatorSources:
+        if executables[options.validator] == '':
+            return
+        inputFiles = [case[1] for case in findCases(options.workingDirectory, True)]
+        if not validateCases(os.path.abspath(executables[options.validator]), inputFiles, limitSettings(options),
+                             options.jobs, options.resultsCache):
+            return
+
+    # The report file is shared by all the sources
+    report = None
+    if options.evaluate and options.report is not None:
+        reportFormat, reportFile = options.report
+        if reportFormat not in reportFormats:
+            print(bcolorsObject.FAIL + 'Error: Unknown report format %s' % (reportFormat) + bcolorsObject.ENDC, file = stderr)
+            return
+        report = reportFormats[reportFormat](reportFile)
+
+    # The workers are shared by all the sources
+    pool = None
+    if options.evaluate and options.workers != '':
+        pool = WorkerPool(options.workers.split(','), options.jobs)
+
+    # Every source is compiled with every flag set at the same time, then the builds are evaluated and compared
+    if flagMatrix:
+        if report is not None:
+            print(bcolorsObject.WARNING + 'The report is not written with a flag matrix' + bcolorsObject.ENDC, file = stderr)
+            report.close()
+        builds = flagMatrixBuilds(args, options.flags)
+        if builds:
+            for build, executable in zip(builds, buildExecutables(builds, options.verbose, options.compileCache, options.jobs, options.pch)):
+                build['executable'] = executable
+            compareBuilds(builds, options.workingDirectory, limitSettings(options, checkerExecutable, interactorExecutable),
+                          options.jobs, options.alternateValues, options.groups, options.resultsCache, pool)
+        if pool is not None:
+            pool.close()
         return
 
     # Execute options
+    benchmarkExecutables, batchExecutables = [], []
     for sourceFile in args:
         #Check if sourceFile exists
         try:
@@ -558,10 +2918,7 @@ def checkEvalType(options, *args):
             print(bcolorsObject.FAIL + 'Error: File %s does not exist' % (str(sourceFile)) + bcolorsObject.ENDC, file = stderr)
             continue
 
-        #Compiling options
-        if options.compile or not options.noCompile:
-            executable = compileSource(sourceFile, options.verbose, options.optimize)
-
+        executable = executables[sourceFile]
         if executable == '':
             continue
 
@@ -572,13 +2929,34 @@ def checkEvalType(options, *args):
             else:
                 subprocess.call(['gdb', executable])
             subprocess.call(['echo', '-ne', bcolorsObject.ENDC])
-        elif options.test: #Test
-            for i in range(options.testingTimes): #Run the program testingTimes
-                print(bcolorsObject.DEBUG + 'Testing %s: %s times' % (str(executable), str(options.testingTimes - i)) + bcolorsObject.ENDC)
-                subprocess.call(['./' + executable]); 
+        elif options.test: #Test, the executables are benchmarked together
+            benchmarkExecutables.append(os.path.abspath(executable))
+        elif options.evaluate and options.batch: #Evaluate, the executables share the suite and the workers
+            batchExecutables.append((sourceFile, os.path.abspath(executable)))
         elif options.evaluate: #Evaluate
-            evaluate(sourceFile, options.workingDirectory, options.evaluationTime, options.verbose, 
-                     options.ioiMode, options.totalMemory, options.noOuts, options.multipleSolutions, options.alternateValues)
+            evaluate(sourceFile, options.workingDirectory, limitSettings(options, checkerExecutable, interactorExecutable),
+                     verbose = options.verbose, alternateValues = options.alternateValues, jobs = options.jobs,
+                     useCache = options.resultsCache, retime = options.retime, groupsFile = options.groups,
+                     runAllCases = options.runAllCases, report = report, pool = pool)
+
+    if batchExecutables:
+        evaluateBatch(batchExecutables, options.workingDirectory, limitSettings(options, checkerExecutable, interactorExecutable), options.jobs,
+                      options.alternateValues, options.groups, options.resultsCache, options.retime, options.runAllCases, report,
+                      pool = pool)
+
+    if report is not None:
+        report.close()
+    if pool is not None:
+        pool.close()
+
+    if benchmarkExecutables:
+        print(bcolorsObject.DEBUG + 'Testing %s: %d times after %d warm-up runs' %
+              (', '.join(map(os.path.relpath, benchmarkExecutables)), options.testingTimes, options.warmup) + bcolorsObject.ENDC)
+        samples = benchmark(benchmarkExecutables, options.benchmarkInput, benchmarkSettings(options), options.testingTimes, options.warmup)
+        for executable, executableSamples in zip(benchmarkExecutables, samples):
+            printBenchmark(os.path.relpath(executable), executableSamples)
+        if len(benchmarkExecutables) == 2:
+            compareBenchmarks(os.path.relpath(benchmarkExecutables[0]), samples[0], os.path.relpath(benchmarkExecutables[1]), samples[1])
 
 if __name__ == '__main__' :
     '''Main entrance to the program if called as a script. Overrides SIGINT behavior, parses the input and
@@ -613,8 +2991,44 @@ if __name__ == '__main__' :
     if not options.terminalColors:
         bcolorsObject.disable()
 
+    # Use every core if no number of jobs was given
+    if options.jobs < 1:
+        options.jobs = os.cpu_count() or 1
+
+    # The benchmark needs at least one measured run
+    if options.test and (options.testingTimes < 1 or options.warmup < 0):
+        print(bcolorsObject.FAIL + 'Error: RUNS must be at least 1 and WARMUP can not be negative' + bcolorsObject.ENDC, file = stderr)
+        exit(-1)
+
+    # Pinning needs the affinity of the processes, which is not available in every platform
+    if options.pin and not hasattr(os, 'sched_setaffinity'):
+        print(bcolorsObject.WARNING + 'CPU affinity is not available, the cases are not pinned' + bcolorsObject.ENDC, file = stderr)
+        options.pin = False
+
+    # Profiling needs perf
+    if options.profile and shutil.which('perf') is None:
+        print(bcolorsObject.WARNING + 'perf was not found, the cases are not profiled' + bcolorsObject.ENDC, file = stderr)
+        options.profile = False
+
+    # Save the speed of the machine where the limits are defined
+    if options.calibrateReference:
+        referenceTime = saveReferenceTime()
+        if referenceTime is None:
+            exit(-1)
+        print(bcolorsObject.DEBUG + 'The reference program takes %.3f seconds, saved in %s' % (referenceTime, REFERENCEFILE) + bcolorsObject.ENDC)
+
+    # Scale the time limits by the speed of this machine relative to the machine where they were defined
+    if options.calibrate:
+        factor = speedFactor()
+        if factor is None:
+            exit(-1)
+        options.evaluationTime *= factor
+        options.wallTime *= factor
+        print(bcolorsObject.DEBUG + 'Speed factor %.2f, the time limit is %.2f seconds' % (factor, options.evaluationTime) + bcolorsObject.ENDC)
+
     # Check if more than one option is used
-    if not trueXor(options.compile, options.debug, options.test, options.evaluate, options.generate):
+    if not trueXor(options.compile, options.debug, options.test, options.evaluate, options.generate, options.stress,
+                   options.worker != ''):
         print(bcolorsObject.FAIL + 'More than one core option was used\nKilling process' + bcolorsObject.ENDC, file = stderr)
         raise MoreOptionsError
 
@@ -4,22 +4,22 @@ import re, os
 
 def main():
     numFiles = 0
-    inRegex = re.compile('^.*\.in\.\d{1,2}$')
-    outRegex = re.compile('^.*\.out\.\d{1,2}$')
+    inRegex = re.compile(r'^.*\.in\.\d{1,2}$')
+    outRegex = re.compile(r'^.*\.out\.\d{1,2}$')
 
     for root, dirs, files in os.walk('./'):
         for name in files:
             if inRegex.match(name):
                 newName = name.replace('.in', '')
                 newName = newName + '.in'
-                os.rename(name, newName)
-                print(name + ' -> ' + newName)
+                os.rename(os.path.join(root, name), os.path.join(root, newName))
+                print(os.path.join(root, name) + ' -> ' + newName)
                 numFiles += 1
             elif outRegex.match(name):
                 newName = name.replace('.out', '')
                 newName = newName + '.out'
-                os.rename(name, newName)
-                print(name + ' -> ' + newName)
+                os.rename(os.path.join(root, name), os.path.join(root, newName))
+                print(os.path.join(root, name) + ' -> ' + newName)
                 numFiles += 1
 
     print('')
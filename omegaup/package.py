@@ -0,0 +1,181 @@
+#!/usr/local/bin/python3
+
+import hashlib, json, os, re, struct, sys, threading, zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Compressed entries of the previous packages, kept inside the problem directory
+CACHEDIRECTORY = '.package'
+CASEREGEX = re.compile(r'^(.*)\.(in|out|sol)(?:\.(\d+))?$')
+BLOCKSIZE = 1 << 20
+# Every entry has the same date, so the same problem always gives the same archive
+DOSTIME, DOSDATE = 0, (1 << 5) | 1
+
+def caseName(name):
+    '''Returns the normalized name of a case file, name.in.N is name.N.in and .sol is .out like in casemove.py
+    returns None if it is not a case file'''
+    match = CASEREGEX.match(name)
+    if match is None:
+        return None
+    stem, ending, number = match.groups()
+    if number is not None:
+        stem += '.' + number
+    return stem + ('.in' if ending == 'in' else '.out')
+
+def scanProblem(problemDirectory, archiveName):
+    '''Walks the problem once, returns a list of (file, archive name) and a list of errors
+    The cases are normalized and every .in must have its .out, the other files are packaged as they are'''
+    entries, errors, cases = [], [], {}
+    for root, dirs, files in os.walk(problemDirectory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        relativeRoot = os.path.relpath(root, problemDirectory)
+        for name in sorted(files):
+            fileName = os.path.join(root, name)
+            if name.startswith('.') or os.path.abspath(fileName) == os.path.abspath(archiveName):
+                continue
+
+            entryName = os.path.normpath(os.path.join(relativeRoot, name)).replace(os.sep, '/')
+            if entryName.split('/')[0] == 'cases':
+                normalizedName = caseName(name)
+                if normalizedName is None:
+                    errors.append('%s is not a case' % (fileName))
+                    continue
+                entryName = '/'.join(entryName.split('/')[:-1] + [normalizedName])
+                if entryName in cases:
+                    errors.append('%s and %s are both %s' % (cases[entryName], fileName, entryName))
+                    continue
+                cases[entryName] = fileName
+            entries.append((fileName, entryName))
+
+    if not cases:
+        errors.append('No cases found in %s' % (os.path.join(problemDirectory, 'cases')))
+    for entryName in sorted(cases):
+        stem, ending = os.path.splitext(entryName)
+        pairName = stem + ('.out' if ending == '.in' else '.in')
+        if pairName not in cases:
+            errors.append('%s has no %s' % (cases[entryName], pairName.split('/')[-1]))
+    return entries, errors
+
+def hashFile(fileName):
+    '''Returns the sha256 hex digest and the crc32 of the contents of fileName'''
+    fileHash, crc = hashlib.sha256(), 0
+    with open(fileName, 'rb') as hashedFile:
+        for block in iter(lambda: hashedFile.read(BLOCKSIZE), b''):
+            fileHash.update(block)
+            crc = zlib.crc32(block, crc)
+    return fileHash.hexdigest(), crc
+
+def packFile(fileName, knownFiles, blobs, cacheDirectory):
+    '''Returns the blob of fileName, a dictionary with the hash, crc, size and compressedSize of its raw deflate stream
+    A file with the same path, modification time and size as before is not read, and a file whose contents
+    were already compressed is not compressed again. Returns (blob, True if it was compressed, [mtime, size])'''
+    fileStat = os.stat(fileName)
+    fileKey = [fileStat.st_mtime_ns, fileStat.st_size]
+    known = knownFiles.get(os.path.abspath(fileName))
+    if known is not None and known[:2] == fileKey and known[2] in blobs:
+        return blobs[known[2]], False, fileKey
+
+    fileHash, crc = hashFile(fileName)
+    if fileHash in blobs:
+        return blobs[fileHash], False, fileKey
+
+    # Blobs are only created by os.replace, so an existing blob is complete. It may have been written by another
+    # thread packing a file with the same contents, or by a package whose index was not saved
+    blobName = os.path.join(cacheDirectory, fileHash)
+    blob = {'hash':fileHash, 'crc':crc, 'size':fileStat.st_size}
+    if os.path.isfile(blobName):
+        return dict(blob, compressedSize=os.path.getsize(blobName)), False, fileKey
+
+    # zlib releases the GIL, so the files are compressed in parallel. Each thread writes its own temporary file,
+    # files with the same contents compressed at the same time replace the blob with the same data
+    temporaryName = blobName + '.%d.%d.tmp' % (os.getpid(), threading.get_ident())
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    with open(fileName, 'rb') as packedFile, open(temporaryName, 'wb') as blobFile:
+        for block in iter(lambda: packedFile.read(BLOCKSIZE), b''):
+            blobFile.write(compressor.compress(block))
+        blobFile.write(compressor.flush())
+    os.replace(temporaryName, blobName)
+    return dict(blob, compressedSize=os.path.getsize(blobName)), True, fileKey
+
+def writeArchive(archiveName, entries, cacheDirectory):
+    '''Writes the zip archive with the (archive name, blob) entries, the blobs are copied without being decompressed
+    The zip64 extensions are used only for the sizes and offsets that do not fit in 32 bits'''
+    centralDirectory = []
+    with open(archiveName + '.tmp', 'wb') as archive:
+        for entryName, blob in entries:
+            offset, name = archive.tell(), entryName.encode()
+            zip64 = blob['size'] >= 0xFFFFFFFF or blob['compressedSize'] >= 0xFFFFFFFF
+            extra = struct.pack('<HHQQ', 1, 16, blob['size'], blob['compressedSize']) if zip64 else b''
+            archive.write(struct.pack('<IHHHHHIIIHH', 0x04034b50, 45 if zip64 else 20, 0x800, 8, DOSTIME, DOSDATE, blob['crc'],
+                                      0xFFFFFFFF if zip64 else blob['compressedSize'], 0xFFFFFFFF if zip64 else blob['size'],
+                                      len(name), len(extra)) + name + extra)
+            with open(os.path.join(cacheDirectory, blob['hash']), 'rb') as blobFile:
+                for block in iter(lambda: blobFile.read(BLOCKSIZE), b''):
+                    archive.write(block)
+
+            # Only the values that do not fit are written in the zip64 extra field of the central directory
+            values = [blob['size'], blob['compressedSize'], offset]
+            large = [value for value in values if value >= 0xFFFFFFFF]
+            extra = struct.pack('<HH', 1, 8*len(large)) + struct.pack('<%dQ' % len(large), *large) if large else b''
+            sizes = [0xFFFFFFFF if value >= 0xFFFFFFFF else value for value in values]
+            centralDirectory.append(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 0x0300 | 45, 45 if large else 20, 0x800, 8,
+                                                DOSTIME, DOSDATE, blob['crc'], sizes[1], sizes[0], len(name), len(extra),
+                                                0, 0, 0, 0o100644 << 16, sizes[2]) + name + extra)
+
+        centralOffset = archive.tell()
+        for header in centralDirectory:
+            archive.write(header)
+        centralSize = archive.tell() - centralOffset
+
+        if len(entries) >= 0xFFFF or centralOffset >= 0xFFFFFFFF or centralSize >= 0xFFFFFFFF:
+            zip64Offset = archive.tell()
+            archive.write(struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, len(entries), len(entries), centralSize, centralOffset))
+            archive.write(struct.pack('<IIQI', 0x07064b50, 0, zip64Offset, 1))
+        archive.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, min(len(entries), 0xFFFF), min(len(entries), 0xFFFF),
+                                  min(centralSize, 0xFFFFFFFF), min(centralOffset, 0xFFFFFFFF), 0))
+    os.replace(archiveName + '.tmp', archiveName)
+
+def main():
+    problemDirectory = sys.argv[1] if len(sys.argv) > 1 else '.'
+    archiveName = sys.argv[2] if len(sys.argv) > 2 else os.path.basename(os.path.abspath(problemDirectory)) + '.zip'
+
+    entries, errors = scanProblem(problemDirectory, archiveName)
+    if errors:
+        for error in errors:
+            print('Error: ' + error)
+        sys.exit(1)
+
+    cacheDirectory = os.path.join(problemDirectory, CACHEDIRECTORY)
+    os.makedirs(cacheDirectory, exist_ok=True)
+    try:
+        with open(os.path.join(cacheDirectory, 'index.json'), 'r') as indexFile:
+            index = json.load(indexFile)
+    except (IOError, ValueError):
+        index = {'files':{}, 'blobs':{}}
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        packed = list(executor.map(lambda entry: packFile(entry[0], index['files'], index['blobs'], cacheDirectory), entries))
+
+    writeArchive(archiveName, [(entryName, blob) for (fileName, entryName), (blob, compressed, fileKey) in zip(entries, packed)],
+                 cacheDirectory)
+
+    # The index only keeps the files and blobs of this package, the blobs that are not used anymore are removed
+    files = dict((os.path.abspath(fileName), fileKey + [blob['hash']])
+                 for (fileName, entryName), (blob, compressed, fileKey) in zip(entries, packed))
+    blobs = dict((blob['hash'], blob) for blob, compressed, fileKey in packed)
+    for name in os.listdir(cacheDirectory):
+        if name != 'index.json' and name not in blobs:
+            os.remove(os.path.join(cacheDirectory, name))
+    with open(os.path.join(cacheDirectory, 'index.json'), 'w') as indexFile:
+        json.dump({'files':files, 'blobs':blobs}, indexFile)
+
+    for fileName, entryName in entries:
+        if os.path.normpath(fileName) != os.path.normpath(os.path.join(problemDirectory, entryName)):
+            print(fileName + ' -> ' + entryName)
+    print('')
+    print('Packaged %d files in %s, %d compressed again' % (len(entries), archiveName, sum(packedFile[1] for packedFile in packed)))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 3:
+        print('Incorrect argument count')
+    else:
+        main()